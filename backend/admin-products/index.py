@@ -1,10 +1,13 @@
 '''API для управления товарами администраторами (CRUD операции)'''
 import json
 import os
-import psycopg2
 import jwt
 from datetime import datetime
 
+from compression import compress_response
+from db_pool import get_connection, release_connection
+
+@compress_response
 def handler(event: dict, context) -> dict:
     method = event.get('httpMethod', 'GET')
     
@@ -65,7 +68,7 @@ def get_products(event: dict) -> dict:
     limit = int(params.get('limit', 20))
     offset = int(params.get('offset', 0))
     
-    conn = psycopg2.connect(os.environ['DATABASE_URL'])
+    conn = get_connection()
     schema = os.environ.get('MAIN_DB_SCHEMA', 'public')
     cur = conn.cursor()
     
@@ -116,8 +119,8 @@ def get_products(event: dict) -> dict:
                 count_params.append(category)
             
             if search:
-                count_query += " AND (to_tsvector('russian', name) @@ plainto_tsquery('russian', %s) OR to_tsvector('russian', brand) @@ plainto_tsquery('russian', %s))"
-                count_params.extend([search, search])
+                count_query += " AND search_vector @@ plainto_tsquery('russian', %s)"
+                count_params.append(search)
             
             cur.execute(count_query, count_params)
             total_count = cur.fetchone()[0]
@@ -134,10 +137,14 @@ def get_products(event: dict) -> dict:
                 params_list.append(category)
             
             if search:
-                query += " AND (to_tsvector('russian', name) @@ plainto_tsquery('russian', %s) OR to_tsvector('russian', brand) @@ plainto_tsquery('russian', %s))"
+                # Самые релевантные совпадения по взвешенному search_vector идут первыми
+                query += " AND search_vector @@ plainto_tsquery('russian', %s)"
+                query += " ORDER BY ts_rank(search_vector, plainto_tsquery('russian', %s)) DESC, id DESC"
                 params_list.extend([search, search])
+            else:
+                query += ' ORDER BY id DESC'
             
-            query += ' ORDER BY id DESC LIMIT %s OFFSET %s'
+            query += ' LIMIT %s OFFSET %s'
             params_list.extend([limit, offset])
             
             cur.execute(query, params_list)
@@ -162,7 +169,7 @@ def get_products(event: dict) -> dict:
             }
     finally:
         cur.close()
-        conn.close()
+        release_connection(conn)
 
 
 def create_product(event: dict) -> dict:
@@ -179,7 +186,7 @@ def create_product(event: dict) -> dict:
                 'body': json.dumps({'error': f'Поле {field} обязательно'})
             }
     
-    conn = psycopg2.connect(os.environ['DATABASE_URL'])
+    conn = get_connection()
     schema = os.environ.get('MAIN_DB_SCHEMA', 'public')
     cur = conn.cursor()
     
@@ -221,7 +228,7 @@ def create_product(event: dict) -> dict:
         raise e
     finally:
         cur.close()
-        conn.close()
+        release_connection(conn)
 
 
 def update_product(event: dict) -> dict:
@@ -237,7 +244,7 @@ def update_product(event: dict) -> dict:
             'body': json.dumps({'error': 'Требуется ID товара'})
         }
     
-    conn = psycopg2.connect(os.environ['DATABASE_URL'])
+    conn = get_connection()
     schema = os.environ.get('MAIN_DB_SCHEMA', 'public')
     cur = conn.cursor()
     
@@ -293,7 +300,7 @@ def update_product(event: dict) -> dict:
         raise e
     finally:
         cur.close()
-        conn.close()
+        release_connection(conn)
 
 
 def delete_product(event: dict) -> dict:
@@ -309,7 +316,7 @@ def delete_product(event: dict) -> dict:
             'body': json.dumps({'error': 'Требуется ID товара'})
         }
     
-    conn = psycopg2.connect(os.environ['DATABASE_URL'])
+    conn = get_connection()
     schema = os.environ.get('MAIN_DB_SCHEMA', 'public')
     cur = conn.cursor()
     
@@ -338,4 +345,4 @@ def delete_product(event: dict) -> dict:
         raise e
     finally:
         cur.close()
-        conn.close()
\ No newline at end of file
+        release_connection(conn)
\ No newline at end of file
@@ -1,8 +1,44 @@
+import hashlib
 import json
 import os
 import psycopg2
 from typing import Optional
 
+from compression import compress_response
+
+
+def get_catalog_version(cur) -> int:
+    cur.execute("SELECT version FROM t_p94134469_chandelier_sale_site.catalog_versions WHERE catalog = 'best_deals'")
+    row = cur.fetchone()
+    return row[0] if row else 0
+
+
+def bump_catalog_version(cur) -> None:
+    """Меняет ETag списка; вызывать в той же транзакции, что и изменение"""
+    cur.execute("""
+        UPDATE t_p94134469_chandelier_sale_site.catalog_versions
+        SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+        WHERE catalog = 'best_deals'
+    """)
+
+
+def make_etag(event: dict, version: int) -> str:
+    """Слабый валидатор из версии каталога и нормализованного запроса"""
+    params = sorted((event.get('queryStringParameters') or {}).items())
+    digest = hashlib.sha1(repr(params).encode('utf-8')).hexdigest()[:16]
+    return f'W/"{version}-{digest}"'
+
+
+def etag_matches(event: dict, etag: str) -> bool:
+    headers = event.get('headers') or {}
+    header = next((v for k, v in headers.items() if k.lower() == 'if-none-match'), '') or ''
+    if header.strip() == '*':
+        return True
+    tags = [tag.strip() for tag in header.split(',')]
+    return any((tag[2:] if tag.startswith('W/') else tag) == etag[2:] for tag in tags)
+
+
+@compress_response
 def handler(event: dict, context) -> dict:
     """API для управления товарами по выгодным ценам"""
     
@@ -14,7 +50,7 @@ def handler(event: dict, context) -> dict:
             'headers': {
                 'Access-Control-Allow-Origin': '*',
                 'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type, X-User-Id, X-Auth-Token'
+                'Access-Control-Allow-Headers': 'Content-Type, X-User-Id, X-Auth-Token, If-None-Match'
             },
             'body': ''
         }
@@ -24,6 +60,16 @@ def handler(event: dict, context) -> dict:
         cur = conn.cursor()
         
         if method == 'GET':
+            etag = make_etag(event, get_catalog_version(cur))
+            if etag_matches(event, etag):
+                cur.close()
+                conn.close()
+                return {
+                    'statusCode': 304,
+                    'headers': {'Access-Control-Allow-Origin': '*', 'ETag': etag},
+                    'body': ''
+                }
+            
             cur.execute("""
                 SELECT id, name, description, price, discount_price, brand, 
                        image_url, images, in_stock, created_at
@@ -55,7 +101,8 @@ def handler(event: dict, context) -> dict:
                 'statusCode': 200,
                 'headers': {
                     'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
+                    'Access-Control-Allow-Origin': '*',
+                    'ETag': etag
                 },
                 'body': json.dumps({'products': products})
             }
@@ -80,6 +127,7 @@ def handler(event: dict, context) -> dict:
             ))
             
             product_id = cur.fetchone()[0]
+            bump_catalog_version(cur)
             conn.commit()
             cur.close()
             conn.close()
@@ -122,6 +170,7 @@ def handler(event: dict, context) -> dict:
                 product_id
             ))
             
+            bump_catalog_version(cur)
             conn.commit()
             cur.close()
             conn.close()
@@ -147,6 +196,7 @@ def handler(event: dict, context) -> dict:
                 }
             
             cur.execute("DELETE FROM best_deals_products WHERE id = %s", (product_id,))
+            bump_catalog_version(cur)
             conn.commit()
             cur.close()
             conn.close()
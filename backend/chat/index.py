@@ -1,11 +1,10 @@
 import json
 import os
-import psycopg2
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 
-def get_db_connection():
-    return psycopg2.connect(os.environ['DATABASE_URL'])
+from db_pool import get_connection, release_connection
+
 
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     method: str = event.get('httpMethod', 'GET')
@@ -56,7 +55,7 @@ def handle_get(event: Dict[str, Any], headers: Dict[str, str]) -> Dict[str, Any]
     params = event.get('queryStringParameters', {}) or {}
     action = params.get('action', 'get_messages')
     
-    conn = get_db_connection()
+    conn = get_connection()
     cur = conn.cursor()
     
     try:
@@ -183,13 +182,13 @@ def handle_get(event: Dict[str, Any], headers: Dict[str, str]) -> Dict[str, Any]
     
     finally:
         cur.close()
-        conn.close()
+        release_connection(conn)
 
 def handle_post(event: Dict[str, Any], headers: Dict[str, str]) -> Dict[str, Any]:
     body_data = json.loads(event.get('body', '{}'))
     action = body_data.get('action')
     
-    conn = get_db_connection()
+    conn = get_connection()
     cur = conn.cursor()
     
     try:
@@ -283,13 +282,13 @@ def handle_post(event: Dict[str, Any], headers: Dict[str, str]) -> Dict[str, Any
     
     finally:
         cur.close()
-        conn.close()
+        release_connection(conn)
 
 def handle_put(event: Dict[str, Any], headers: Dict[str, str]) -> Dict[str, Any]:
     body_data = json.loads(event.get('body', '{}'))
     action = body_data.get('action')
     
-    conn = get_db_connection()
+    conn = get_connection()
     cur = conn.cursor()
     
     try:
@@ -351,7 +350,7 @@ def handle_put(event: Dict[str, Any], headers: Dict[str, str]) -> Dict[str, Any]
     
     finally:
         cur.close()
-        conn.close()
+        release_connection(conn)
 
 def handle_delete(event: Dict[str, Any], headers: Dict[str, str]) -> Dict[str, Any]:
     params = event.get('queryStringParameters', {}) or {}
@@ -365,7 +364,7 @@ def handle_delete(event: Dict[str, Any], headers: Dict[str, str]) -> Dict[str, A
             'isBase64Encoded': False
         }
     
-    conn = get_db_connection()
+    conn = get_connection()
     cur = conn.cursor()
     
     try:
@@ -382,4 +381,4 @@ def handle_delete(event: Dict[str, Any], headers: Dict[str, str]) -> Dict[str, A
     
     finally:
         cur.close()
-        conn.close()
\ No newline at end of file
+        release_connection(conn)
\ No newline at end of file
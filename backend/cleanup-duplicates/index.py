@@ -1,9 +1,7 @@
 import json
-import os
-import psycopg2
 
 def handler(event: dict, context) -> dict:
-    '''Удаляет дубликаты товаров по артикулу, оставляя самую свежую запись'''
+    '''Раньше удаляла дубликаты товаров по артикулу; теперь их не допускает уникальный индекс'''
     
     method = event.get('httpMethod', 'GET')
     
@@ -25,48 +23,14 @@ def handler(event: dict, context) -> dict:
             'body': json.dumps({'error': 'Method not allowed'})
         }
     
-    dsn = os.environ.get('DATABASE_URL')
-    if not dsn:
-        return {
-            'statusCode': 500,
-            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({'error': 'DATABASE_URL not configured'})
-        }
-    
-    conn = psycopg2.connect(dsn)
-    cur = conn.cursor()
-    
-    # Сначала подсчитаем дубликаты
-    cur.execute("""
-        SELECT COUNT(*)
-        FROM t_p94134469_chandelier_sale_site.products
-        WHERE id NOT IN (
-            SELECT MAX(id)
-            FROM t_p94134469_chandelier_sale_site.products
-            GROUP BY article
-        )
-    """)
-    duplicates_count = cur.fetchone()[0]
-    
-    # Удаляем дубликаты, оставляя запись с максимальным id для каждого артикула
-    cur.execute("""
-        DELETE FROM t_p94134469_chandelier_sale_site.products
-        WHERE id NOT IN (
-            SELECT MAX(id)
-            FROM t_p94134469_chandelier_sale_site.products
-            GROUP BY article
-        )
-    """)
-    
-    conn.commit()
-    cur.close()
-    conn.close()
-    
+    # Дубликаты по артикулу больше не появляются: импорт обновляет товар по уникальному индексу
+    # idx_products_article_unique (V0038), поэтому полный проход по таблице не нужен.
+    # Функция оставлена, чтобы не ломать существующие вызовы
     return {
         'statusCode': 200,
         'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
         'body': json.dumps({
-            'deleted': duplicates_count,
-            'message': f'Удалено {duplicates_count} дубликатов товаров'
+            'deleted': 0,
+            'message': 'Дубликаты по артикулу исключены уникальным индексом, очистка не требуется'
         })
     }
@@ -31,21 +31,10 @@ def handle(event: dict, origin: str = '*') -> dict:
 
     S = get_schema()
 
-    rate_check = query_one(f"""
-        SELECT failed_login_attempts, last_failed_login_at
-        FROM {S}users WHERE email = {escape(email)}
-    """)
-
-    if rate_check:
-        attempts, last_failed = rate_check
-        if attempts and attempts >= MAX_LOGIN_ATTEMPTS and last_failed:
-            lockout_until = last_failed + timedelta(minutes=LOCKOUT_MINUTES)
-            if datetime.utcnow() < lockout_until:
-                remaining = int((lockout_until - datetime.utcnow()).total_seconds())
-                return error(429, f'Слишком много попыток. Повторите через {remaining // 60 + 1} мин.', origin)
-
+    # Lockout state and credentials come from the same row, so one lookup serves both checks
     user = query_one(f"""
-        SELECT id, email, name, first_name, last_name, password_hash, email_verified
+        SELECT id, email, name, first_name, last_name, password_hash, email_verified,
+               failed_login_attempts, last_failed_login_at
         FROM {S}users WHERE email = {escape(email)}
     """)
 
@@ -54,7 +43,14 @@ def handle(event: dict, origin: str = '*') -> dict:
     if not user:
         return error(401, auth_error_msg, origin)
 
-    user_id, user_email, user_name, first_name, last_name, stored_hash, email_verified = user
+    (user_id, user_email, user_name, first_name, last_name, stored_hash, email_verified,
+     attempts, last_failed) = user
+
+    if attempts and attempts >= MAX_LOGIN_ATTEMPTS and last_failed:
+        lockout_until = last_failed + timedelta(minutes=LOCKOUT_MINUTES)
+        if datetime.utcnow() < lockout_until:
+            remaining = int((lockout_until - datetime.utcnow()).total_seconds())
+            return error(429, f'Слишком много попыток. Повторите через {remaining // 60 + 1} мин.', origin)
     
     # Use name if set, otherwise combine first_name + last_name
     if not user_name and first_name:
@@ -66,7 +62,7 @@ def handle(event: dict, origin: str = '*') -> dict:
             UPDATE {S}users
             SET failed_login_attempts = COALESCE(failed_login_attempts, 0) + 1,
                 last_failed_login_at = {escape(now)}
-            WHERE email = {escape(email)}
+            WHERE id = {escape(user_id)}
         """)
         return error(401, auth_error_msg, origin)
 
@@ -75,23 +71,24 @@ def handle(event: dict, origin: str = '*') -> dict:
         return error(403, 'Email не подтверждён. Проверьте почту.', origin)
 
     now = datetime.utcnow().isoformat()
-    execute(f"""
-        UPDATE {S}users
-        SET failed_login_attempts = 0,
-            last_failed_login_at = NULL,
-            last_login_at = {escape(now)}
-        WHERE id = {escape(user_id)}
-    """)
-
     access_token = create_access_token(user_id, user_email)
     refresh_token, refresh_expires = create_refresh_token(user_id)
 
     refresh_hash = hash_token(refresh_token)
     expires_at = refresh_expires.isoformat()
 
+    # Reset the failure counter and store the refresh token in one round trip
     execute(f"""
+        WITH logged_in AS (
+            UPDATE {S}users
+            SET failed_login_attempts = 0,
+                last_failed_login_at = NULL,
+                last_login_at = {escape(now)}
+            WHERE id = {escape(user_id)}
+            RETURNING id
+        )
         INSERT INTO {S}refresh_tokens (user_id, token_hash, expires_at, created_at)
-        VALUES ({escape(user_id)}, {escape(refresh_hash)}, {escape(expires_at)}, {escape(now)})
+        SELECT id, {escape(refresh_hash)}, {escape(expires_at)}, {escape(now)} FROM logged_in
     """)
 
     return response(200, {
@@ -12,6 +12,7 @@ Routes (via ?action= query parameter):
 """
 from handlers import register, login, logout, refresh, reset_password, health, verify_email
 from utils.http import options_response, error, get_origin_from_event
+from utils.db import transaction
 
 
 ROUTES = {
@@ -42,7 +43,8 @@ def handler(event: dict, context) -> dict:
 
     # Some actions allow GET
     if action in GET_ACTIONS and method == 'GET':
-        return ROUTES[action](event, origin)
+        with transaction():
+            return ROUTES[action](event, origin)
 
     if method != 'POST':
         return error(405, 'Method not allowed', origin)
@@ -50,4 +52,6 @@ def handler(event: dict, context) -> dict:
     if not action or action not in ROUTES:
         return error(404, f'Unknown action: {action}. Use ?action=health|login|register|refresh|logout|reset-password|verify-email', origin)
 
-    return ROUTES[action](event, origin)
+    # All statements of one request share a connection and commit together
+    with transaction():
+        return ROUTES[action](event, origin)
@@ -1,15 +1,13 @@
 """Database utilities for Simple Query Protocol."""
 import os
-import psycopg2
+from contextlib import contextmanager
 from typing import Any
 
+from utils.db_pool import get_connection, release_connection
 
-def get_connection():
-    """Get database connection."""
-    dsn = os.environ.get('DATABASE_URL')
-    if not dsn:
-        raise ValueError('DATABASE_URL not configured')
-    return psycopg2.connect(dsn)
+
+# Connection of the currently open transaction() block, if any
+_active_conn = None
 
 
 def get_schema() -> str:
@@ -31,45 +29,68 @@ def escape(value: Any) -> str:
     return f"'{s}'"
 
 
+def _run(sql: str, fetch: str = ''):
+    """Execute statement on the active unit of work or on a short-lived connection."""
+    conn = _active_conn or get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute(sql)
+        if fetch == 'all':
+            result = cur.fetchall()
+        elif fetch == 'one':
+            result = cur.fetchone()
+        else:
+            result = None
+        if conn is not _active_conn:
+            conn.commit()
+        return result
+    finally:
+        cur.close()
+        if conn is not _active_conn:
+            release_connection(conn)
+
+
+@contextmanager
+def transaction():
+    """
+    Unit of work: every query helper called inside the block runs on one
+    connection and the statements are committed together when it exits.
+    Nested blocks join the outer one.
+    """
+    global _active_conn
+    if _active_conn is not None:
+        yield _active_conn
+        return
+
+    conn = get_connection()
+    _active_conn = conn
+    try:
+        yield conn
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        _active_conn = None
+        release_connection(conn)
+
+
 def query(sql: str) -> list:
     """Execute SELECT query and return all rows."""
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute(sql)
-    rows = cur.fetchall()
-    cur.close()
-    conn.close()
-    return rows
+    return _run(sql, 'all')
 
 
 def query_one(sql: str):
     """Execute SELECT query and return first row or None."""
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute(sql)
-    row = cur.fetchone()
-    cur.close()
-    conn.close()
-    return row
+    return _run(sql, 'one')
 
 
 def execute(sql: str) -> None:
     """Execute INSERT/UPDATE/DELETE query."""
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute(sql)
-    conn.commit()
-    cur.close()
-    conn.close()
+    _run(sql)
 
 
 def execute_returning(sql: str):
     """Execute INSERT with RETURNING and return first value."""
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute(sql)
-    result = cur.fetchone()
-    conn.commit()
-    cur.close()
-    conn.close()
+    result = _run(sql, 'one')
     return result[0] if result else None
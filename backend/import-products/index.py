@@ -443,8 +443,31 @@ def parse_product_page(url: str) -> Optional[Dict[str, Any]]:
         return None
 
 
+# Columns refreshed when a product with the same article is imported again
+UPSERT_COLUMNS = (
+    'name', 'price', 'brand', 'description', 'type', 'image_url', 'in_stock',
+    'rating', 'reviews', 'has_remote', 'is_dimmable', 'has_color_change',
+    'brand_country', 'manufacturer_country', 'collection', 'style',
+    'lamp_type', 'socket_type', 'bulb_type', 'lamp_count', 'lamp_power',
+    'total_power', 'lighting_area', 'voltage', 'color',
+    'height', 'diameter', 'length', 'width', 'depth', 'chain_length', 'images',
+    'assembly_instruction_url'
+)
+
+ON_ARTICLE_CONFLICT = (
+    "ON CONFLICT (article) WHERE article IS NOT NULL AND article <> '' DO UPDATE SET "
+    + ', '.join(f'{column} = EXCLUDED.{column}' for column in UPSERT_COLUMNS)
+    + ', updated_at = CURRENT_TIMESTAMP '
+    + f"WHERE ({', '.join(f'products.{column}' for column in UPSERT_COLUMNS)}) "
+    + f"IS DISTINCT FROM ({', '.join(f'EXCLUDED.{column}' for column in UPSERT_COLUMNS)})"
+)
+
+
 def insert_product(cur, data: Dict[str, Any]) -> None:
-    '''Insert product into database with proper column mapping'''
+    '''
+    Insert product into database with proper column mapping.
+    A product whose article already exists is updated instead, and only if something changed
+    '''
     cur.execute('''
         INSERT INTO products (
             name, price, brand, description, type, image_url, in_stock,
@@ -459,7 +482,7 @@ def insert_product(cur, data: Dict[str, Any]) -> None:
             %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
             %s, %s, %s, %s, %s, %s, %s, %s
         )
-    ''', (
+    ''' + ON_ARTICLE_CONFLICT, (
         data.get('name', 'Без названия'),
         float(data.get('price', 0)),
         data.get('brand', 'Неизвестный'),
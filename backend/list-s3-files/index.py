@@ -3,6 +3,9 @@ import json
 import os
 import boto3
 
+from compression import compress_response
+
+@compress_response
 def handler(event: dict, context) -> dict:
     method = event.get('httpMethod', 'GET')
     
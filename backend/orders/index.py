@@ -1,10 +1,14 @@
+import io
 import json
 import os
 from typing import Dict, Any, List
 from decimal import Decimal
-import psycopg2
 from psycopg2.extras import RealDictCursor
 
+from compression import compress_response
+from db_pool import get_connection, release_connection
+from json_stream import write_array
+
 
 def escape_sql(value):
     if value is None:
@@ -12,6 +16,7 @@ def escape_sql(value):
     return "'" + str(value).replace("'", "''") + "'"
 
 
+@compress_response
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     '''
     Управление заказами: создание заказа, получение списка заказов
@@ -32,7 +37,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         }
     
     try:
-        conn = psycopg2.connect(os.environ['DATABASE_URL'])
+        conn = get_connection()
         cur = conn.cursor(cursor_factory=RealDictCursor)
         
         if method == 'GET':
@@ -77,22 +82,28 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                     'isBase64Encoded': False
                 }
             else:
-                cur.execute('''
+                # Серверный курсор: заказы читаются и кодируются пачками, а не всем списком сразу
+                orders_cur = conn.cursor(name='orders_list', cursor_factory=RealDictCursor)
+                orders_cur.execute('''
                     SELECT * FROM t_p94134469_chandelier_sale_site.orders 
                     ORDER BY created_at DESC
                 ''')
-                orders = cur.fetchall()
                 
-                orders_list = []
-                for order in orders:
-                    order_dict = dict(order)
-                    order_dict['total_amount'] = float(order_dict['total_amount'])
-                    orders_list.append(order_dict)
+                def encode_batch(orders: List[Dict[str, Any]]) -> str:
+                    for order in orders:
+                        order['total_amount'] = float(order['total_amount'])
+                    return json.dumps(orders, default=str, ensure_ascii=False)
+                
+                body = io.StringIO()
+                body.write('{"orders": ')
+                write_array(body, orders_cur, encode_batch)
+                body.write('}')
+                orders_cur.close()
                 
                 return {
                     'statusCode': 200,
                     'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                    'body': json.dumps({'orders': orders_list}, default=str, ensure_ascii=False),
+                    'body': body.getvalue(),
                     'isBase64Encoded': False
                 }
         
@@ -238,4 +249,4 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         if 'cur' in locals():
             cur.close()
         if 'conn' in locals():
-            conn.close()
+            release_connection(conn)
@@ -0,0 +1,355 @@
+'''
+COPY-based bulk import of products.
+
+Rows are validated and coerced in Python, so a bad value is reported for its
+own row instead of failing the whole statement. Valid rows are then streamed
+with COPY FROM STDIN (text format) into a temporary staging table shaped like products,
+and merged into products with one set-based upsert keyed on article.
+'''
+import io
+import json
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, List, Optional, Tuple
+
+# Response key, column, kind and default for every imported field.
+# Kinds: text(max length), int, numeric(max absolute value), bool, json
+IMPORT_COLUMNS: List[Tuple[str, str, Tuple[Any, ...], Any]] = [
+    ('name', 'name', ('text', 255), None),
+    ('description', 'description', ('text', None), ''),
+    ('price', 'price', ('numeric', Decimal('99999999.99')), None),
+    ('brand', 'brand', ('text', 100), None),
+    ('type', 'type', ('text', 50), None),
+    ('image', 'image_url', ('text', None), ''),
+    ('inStock', 'in_stock', ('bool',), True),
+    ('rating', 'rating', ('numeric', Decimal('9.9')), Decimal('5.0')),
+    ('reviews', 'reviews', ('int',), 0),
+    ('hasRemote', 'has_remote', ('bool',), False),
+    ('isDimmable', 'is_dimmable', ('bool',), False),
+    ('hasColorChange', 'has_color_change', ('bool',), False),
+    ('article', 'article', ('text', 100), None),
+    ('brandCountry', 'brand_country', ('text', 100), None),
+    ('manufacturerCountry', 'manufacturer_country', ('text', 100), None),
+    ('collection', 'collection', ('text', 200), None),
+    ('style', 'style', ('text', 100), None),
+    ('lampType', 'lamp_type', ('text', 100), None),
+    ('socketType', 'socket_type', ('text', 50), None),
+    ('bulbType', 'bulb_type', ('text', 100), None),
+    ('lampCount', 'lamp_count', ('int',), None),
+    ('lampPower', 'lamp_power', ('int',), None),
+    ('totalPower', 'total_power', ('int',), None),
+    ('lightingArea', 'lighting_area', ('int',), None),
+    ('voltage', 'voltage', ('int',), None),
+    ('color', 'color', ('text', 100), None),
+    ('height', 'height', ('int',), None),
+    ('diameter', 'diameter', ('int',), None),
+    ('length', 'length', ('int',), None),
+    ('width', 'width', ('int',), None),
+    ('depth', 'depth', ('int',), None),
+    ('chainLength', 'chain_length', ('int',), None),
+    ('materials', 'materials', ('text', 500), None),
+    ('frameMaterial', 'frame_material', ('text', 100), None),
+    ('shadeMaterial', 'shade_material', ('text', 100), None),
+    ('frameColor', 'frame_color', ('text', 100), None),
+    ('shadeColor', 'shade_color', ('text', 100), None),
+    ('shadeDirection', 'shade_direction', ('text', 100), None),
+    ('diffuserType', 'diffuser_type', ('text', 100), None),
+    ('diffuserShape', 'diffuser_shape', ('text', 100), None),
+    ('ipRating', 'ip_rating', ('text', 20), None),
+    ('interior', 'interior', ('text', 500), None),
+    ('place', 'place', ('text', 200), None),
+    ('suspendedCeiling', 'suspended_ceiling', ('bool',), False),
+    ('mountType', 'mount_type', ('text', 100), None),
+    ('officialWarranty', 'official_warranty', ('text', 100), None),
+    ('shopWarranty', 'shop_warranty', ('text', 100), None),
+    ('section', 'section', ('text', 200), None),
+    ('catalog', 'catalog', ('text', 200), None),
+    ('subcategory', 'subcategory', ('text', 200), None),
+    ('images', 'images', ('json',), []),
+]
+
+REQUIRED_FIELDS = ('name', 'price', 'brand', 'type')
+
+IMPORT_COLUMN_NAMES = [column for _, column, _, _ in IMPORT_COLUMNS]
+
+TRUE_VALUES = {'true', '1', 'yes', 'да'}
+FALSE_VALUES = {'false', '0', 'no', 'нет', ''}
+
+COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+
+def coerce(value: Any, kind: Tuple[Any, ...]) -> Any:
+    '''Convert a JSON value to what the column accepts, raise ValueError otherwise'''
+    if value is None:
+        return None
+    if kind[0] == 'text':
+        text = value if isinstance(value, str) else str(value)
+        if kind[1] is not None and len(text) > kind[1]:
+            raise ValueError(f'длиннее {kind[1]} символов')
+        return text
+    if kind[0] == 'bool':
+        if isinstance(value, bool):
+            return value
+        normalized = str(value).strip().lower()
+        if normalized in TRUE_VALUES:
+            return True
+        if normalized in FALSE_VALUES:
+            return False
+        raise ValueError('не логическое значение')
+    if kind[0] == 'json':
+        if isinstance(value, str):
+            value = json.loads(value) if value.strip() else []
+        return json.dumps(value, ensure_ascii=False)
+    if isinstance(value, str) and not value.strip():
+        return None
+    if isinstance(value, bool):
+        raise ValueError('не число')
+    try:
+        number = Decimal(str(value).strip().replace(',', '.'))
+    except InvalidOperation:
+        raise ValueError('не число')
+    if not number.is_finite():
+        raise ValueError('не число')
+    if kind[0] == 'int':
+        if number != number.to_integral_value() or abs(number) > 2147483647:
+            raise ValueError('не целое число')
+        return int(number)
+    if abs(number) > kind[1]:
+        raise ValueError(f'вне диапазона (максимум {kind[1]})')
+    return number
+
+
+def validate_product(product: Any) -> Tuple[Optional[list], Optional[str]]:
+    '''Row values in IMPORT_COLUMNS order, or an error message'''
+    if not isinstance(product, dict):
+        return None, 'не объект'
+    missing = [key for key in REQUIRED_FIELDS if product.get(key) in (None, '')]
+    if missing:
+        return None, f"отсутствуют обязательные поля: {', '.join(missing)}"
+
+    row = []
+    for key, _, kind, default in IMPORT_COLUMNS:
+        value = product.get(key)
+        try:
+            value = coerce(value, kind) if value is not None else coerce(default, kind)
+        except (ValueError, TypeError) as e:
+            return None, f'{key}: {e}'
+        row.append(value)
+    return row, None
+
+
+def validate_products(products: List[Any], offset: int = 0) -> Tuple[List[list], List[Dict[str, Any]]]:
+    '''
+    Split a payload into valid rows, prefixed with their position in the payload,
+    and per-row errors. offset is added to positions of a chunk of a larger payload.
+    '''
+    rows = []
+    errors = []
+    for i, product in enumerate(products):
+        row, error = validate_product(product)
+        if error:
+            name = product.get('name') if isinstance(product, dict) else None
+            article = product.get('article') if isinstance(product, dict) else None
+            errors.append({'row': offset + i, 'name': name, 'article': article, 'error': error})
+        else:
+            rows.append([offset + i] + row)
+    return rows, errors
+
+
+def copy_value(value: Any) -> str:
+    '''Encode a coerced value for COPY text format'''
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, str):
+        return value.translate(COPY_ESCAPES)
+    return str(value)
+
+
+def copy_to_staging(cur, rows: List[list]) -> None:
+    '''Load validated rows into the temporary products_staging table, created per transaction'''
+    cur.execute(f"""
+        CREATE TEMP TABLE IF NOT EXISTS products_staging ON COMMIT DROP AS
+        SELECT 0 AS row_no, {', '.join(IMPORT_COLUMN_NAMES)}
+        FROM t_p94134469_chandelier_sale_site.products
+        WITH NO DATA
+    """)
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write('\t'.join(copy_value(value) for value in row))
+        buffer.write('\n')
+    buffer.seek(0)
+    cur.copy_expert(f"COPY products_staging (row_no, {', '.join(IMPORT_COLUMN_NAMES)}) FROM STDIN", buffer)
+
+
+IMPORT_MODES = ('upsert', 'insert')
+
+# Conflict target matching the partial unique index on article; rows without an article never conflict
+ARTICLE_CONFLICT = "ON CONFLICT (article) WHERE article IS NOT NULL AND article <> ''"
+
+
+def merge_staging(cur, mode: str = 'upsert') -> Dict[str, int]:
+    '''
+    Merge staged rows into products by article in payload order.
+    upsert - existing articles are updated, but only when some imported column differs,
+    so re-importing an unchanged price list writes nothing;
+    insert - existing articles are left as they are.
+    Within one payload the last row of an article wins.
+    Returns counts of inserted and updated rows.
+    '''
+    columns = ', '.join(IMPORT_COLUMN_NAMES)
+    updated_columns = [column for column in IMPORT_COLUMN_NAMES if column != 'article']
+    if mode == 'upsert':
+        on_conflict = (
+            f"{ARTICLE_CONFLICT} DO UPDATE SET "
+            + ', '.join(f'{column} = EXCLUDED.{column}' for column in updated_columns)
+            + ', updated_at = CURRENT_TIMESTAMP '
+            + f"WHERE ({', '.join(f'products.{column}' for column in updated_columns)}) "
+            + f"IS DISTINCT FROM ({', '.join(f'EXCLUDED.{column}' for column in updated_columns)})"
+        )
+    else:
+        on_conflict = f'{ARTICLE_CONFLICT} DO NOTHING'
+
+    cur.execute(f"""
+        WITH merged AS (
+            INSERT INTO t_p94134469_chandelier_sale_site.products AS products ({columns})
+            SELECT {columns} FROM products_staging s
+            WHERE COALESCE(s.article, '') = ''
+               OR NOT EXISTS (
+                   SELECT 1 FROM products_staging later
+                   WHERE later.article = s.article AND later.row_no > s.row_no
+               )
+            ORDER BY row_no
+            {on_conflict}
+            RETURNING (xmax = 0) AS inserted
+        )
+        SELECT COUNT(*) FILTER (WHERE inserted), COUNT(*) FILTER (WHERE NOT inserted) FROM merged
+    """)
+    inserted, updated = cur.fetchone()
+    return {'inserted': inserted, 'updated': updated}
+
+
+JOB_COLUMNS = (
+    'id', 'status', 'mode', 'total_rows', 'chunk_size', 'total_chunks', 'next_chunk',
+    'inserted', 'updated', 'unchanged', 'failed_rows', 'failed_chunks', 'uploaded_rows'
+)
+
+
+def create_job(cur, mode: str, total_rows: int, chunk_size: int) -> Dict[str, Any]:
+    total_chunks = (total_rows + chunk_size - 1) // chunk_size
+    cur.execute(f"""
+        INSERT INTO t_p94134469_chandelier_sale_site.import_jobs (status, mode, total_rows, chunk_size, total_chunks)
+        VALUES ('uploading', %s, %s, %s, %s)
+        RETURNING {', '.join(JOB_COLUMNS)}
+    """, (mode, total_rows, chunk_size, total_chunks))
+    return dict(zip(JOB_COLUMNS, cur.fetchone()))
+
+
+def store_payload(cur, job: Dict[str, Any], offset: int, products: List[Any]) -> None:
+    '''
+    Save uploaded products starting at row offset, one import_job_payloads row per chunk.
+    offset must be chunk-aligned; parts already stored (a retried upload) are left as they are.
+    '''
+    size = job['chunk_size']
+    rows = [
+        (job['id'], (offset + start) // size, json.dumps(products[start:start + size], ensure_ascii=False))
+        for start in range(0, len(products), size)
+    ]
+    cur.executemany("""
+        INSERT INTO t_p94134469_chandelier_sale_site.import_job_payloads (job_id, chunk_no, products)
+        VALUES (%s, %s, %s)
+        ON CONFLICT (job_id, chunk_no) DO NOTHING
+    """, rows)
+    cur.execute("""
+        UPDATE t_p94134469_chandelier_sale_site.import_jobs
+        SET uploaded_rows = GREATEST(uploaded_rows, %s),
+            status = CASE WHEN status = 'uploading' AND GREATEST(uploaded_rows, %s) >= total_rows
+                          THEN 'running' ELSE status END,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE id = %s
+    """, (offset + len(products), offset + len(products), job['id']))
+
+
+def load_payload(cur, job_id: int, chunk_no: int) -> Optional[List[Any]]:
+    '''Uploaded products of one chunk, None if that part has not been uploaded'''
+    cur.execute("""
+        SELECT products FROM t_p94134469_chandelier_sale_site.import_job_payloads
+        WHERE job_id = %s AND chunk_no = %s
+    """, (job_id, chunk_no))
+    row = cur.fetchone()
+    if not row:
+        return None
+    return json.loads(row[0]) if isinstance(row[0], str) else row[0]
+
+
+def load_job(cur, job_id: int, lock: bool = False) -> Optional[Dict[str, Any]]:
+    '''Read an import job; lock=True holds its row until the end of the transaction'''
+    cur.execute(f"""
+        SELECT {', '.join(JOB_COLUMNS)} FROM t_p94134469_chandelier_sale_site.import_jobs
+        WHERE id = %s{' FOR UPDATE' if lock else ''}
+    """, (job_id,))
+    row = cur.fetchone()
+    return dict(zip(JOB_COLUMNS, row)) if row else None
+
+
+def load_job_chunks(cur, job_id: int) -> List[Dict[str, Any]]:
+    '''Chunks that failed or had invalid rows, for the job status report'''
+    cur.execute("""
+        SELECT chunk_no, status, failed_rows, row_errors, error
+        FROM t_p94134469_chandelier_sale_site.import_job_chunks
+        WHERE job_id = %s AND (status = 'failed' OR failed_rows > 0)
+        ORDER BY chunk_no
+    """, (job_id,))
+    return [
+        {'chunk': chunk_no, 'status': status, 'failedRows': failed_rows, 'rowErrors': row_errors, 'error': error}
+        for chunk_no, status, failed_rows, row_errors, error in cur.fetchall()
+    ]
+
+
+def record_chunk(
+    cur,
+    job: Dict[str, Any],
+    chunk_no: int,
+    merged: Optional[Dict[str, int]],
+    valid_rows: int,
+    row_errors: List[Dict[str, Any]],
+    error: Optional[str] = None
+) -> None:
+    '''
+    Store the outcome of a chunk and advance the job past it, in the chunk's transaction.
+    merged is None when the chunk was rolled back; all of its rows then count as failed.
+    The chunk's stored products are no longer needed and are deleted.
+    '''
+    if merged is None:
+        status, inserted, updated, unchanged, failed_rows = 'failed', 0, 0, 0, valid_rows + len(row_errors)
+    else:
+        status = 'committed'
+        inserted, updated = merged['inserted'], merged['updated']
+        unchanged = valid_rows - inserted - updated
+        failed_rows = len(row_errors)
+
+    cur.execute("""
+        INSERT INTO t_p94134469_chandelier_sale_site.import_job_chunks
+            (job_id, chunk_no, status, inserted, updated, unchanged, failed_rows, row_errors, error)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+        ON CONFLICT (job_id, chunk_no) DO UPDATE SET
+            status = EXCLUDED.status, inserted = EXCLUDED.inserted, updated = EXCLUDED.updated,
+            unchanged = EXCLUDED.unchanged, failed_rows = EXCLUDED.failed_rows,
+            row_errors = EXCLUDED.row_errors, error = EXCLUDED.error, finished_at = CURRENT_TIMESTAMP
+    """, (job['id'], chunk_no, status, inserted, updated, unchanged, failed_rows,
+          json.dumps(row_errors, ensure_ascii=False), error))
+    cur.execute("""
+        UPDATE t_p94134469_chandelier_sale_site.import_jobs
+        SET next_chunk = %s,
+            inserted = inserted + %s, updated = updated + %s, unchanged = unchanged + %s,
+            failed_rows = failed_rows + %s, failed_chunks = failed_chunks + %s,
+            status = CASE WHEN %s >= total_chunks THEN 'completed'
+                          WHEN uploaded_rows < total_rows THEN 'uploading' ELSE 'running' END,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE id = %s
+    """, (chunk_no + 1, inserted, updated, unchanged, failed_rows, 1 if merged is None else 0,
+          chunk_no + 1, job['id']))
+    cur.execute("""
+        DELETE FROM t_p94134469_chandelier_sale_site.import_job_payloads
+        WHERE job_id = %s AND chunk_no = %s
+    """, (job['id'], chunk_no))
@@ -0,0 +1,121 @@
+'''
+Set-based bulk update of prices, stock and flags.
+
+Patches are validated in Python and copied into a temporary staging table.
+Rows addressed by article are resolved to ids through the unique article
+index, and all products are updated with one UPDATE ... FROM. Each patch
+row gets its own outcome.
+'''
+import io
+from typing import Any, Dict, List, Tuple
+
+from bulk_import import coerce, copy_value
+
+# Request key, column, kind and SQL type of every patchable field
+PATCH_FIELDS: List[Tuple[str, str, Tuple[Any, ...], str]] = [
+    ('price', 'price', ('numeric', 99999999), 'NUMERIC(10, 2)'),
+    ('inStock', 'in_stock', ('bool',), 'BOOLEAN'),
+    ('isSale', 'is_sale', ('bool',), 'BOOLEAN'),
+    ('isNew', 'is_new', ('bool',), 'BOOLEAN'),
+    ('pickupAvailable', 'pickup_available', ('bool',), 'BOOLEAN'),
+    ('hasRemote', 'has_remote', ('bool',), 'BOOLEAN'),
+    ('isDimmable', 'is_dimmable', ('bool',), 'BOOLEAN'),
+    ('hasColorChange', 'has_color_change', ('bool',), 'BOOLEAN'),
+]
+
+PATCH_COLUMNS = [column for _, column, _, _ in PATCH_FIELDS]
+
+
+def validate_patches(items: List[Any]) -> Tuple[List[list], List[Dict[str, Any]]]:
+    '''
+    Staging rows (row_no, id, article, fields...) for valid patches and outcomes for invalid ones.
+    A field that is absent or null is left unchanged.
+    '''
+    rows = []
+    invalid = []
+    for i, item in enumerate(items):
+        if not isinstance(item, dict):
+            invalid.append({'row': i, 'status': 'invalid', 'error': 'не объект'})
+            continue
+        product_id = item.get('id')
+        article = item.get('article')
+        try:
+            if product_id is not None:
+                product_id = coerce(product_id, ('int',))
+            if article is not None:
+                article = coerce(article, ('text', 100))
+            if product_id is None and not article:
+                raise ValueError('нужен id или article')
+            values = [coerce(item.get(key), kind) for key, _, kind, _ in PATCH_FIELDS]
+            if all(value is None for value in values):
+                raise ValueError('нет полей для обновления')
+        except ValueError as e:
+            invalid.append({'row': i, 'id': item.get('id'), 'article': item.get('article'), 'status': 'invalid', 'error': str(e)})
+            continue
+        rows.append([i, product_id, article] + values)
+    return rows, invalid
+
+
+def apply_patches(cur, rows: List[list]) -> List[Dict[str, Any]]:
+    '''
+    Apply staged patches in one statement. Outcomes per row:
+    updated, unchanged (values already equal), not_found, or duplicate
+    (a later row in the payload patches the same product and wins).
+    '''
+    cur.execute(f"""
+        CREATE TEMP TABLE IF NOT EXISTS products_patch (
+            row_no INTEGER, id INTEGER, article VARCHAR(100),
+            {', '.join(f'{column} {sql_type}' for _, column, _, sql_type in PATCH_FIELDS)}
+        ) ON COMMIT DROP
+    """)
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write('\t'.join(copy_value(value) for value in row))
+        buffer.write('\n')
+    buffer.seek(0)
+    cur.copy_expert(f"COPY products_patch (row_no, id, article, {', '.join(PATCH_COLUMNS)}) FROM STDIN", buffer)
+
+    cur.execute("""
+        UPDATE products_patch s SET id = p.id
+        FROM t_p94134469_chandelier_sale_site.products p
+        WHERE s.id IS NULL AND p.article = s.article AND p.article <> ''
+    """)
+    cur.execute("""
+        SELECT s.row_no, s.id FROM products_patch s
+        WHERE EXISTS (SELECT 1 FROM t_p94134469_chandelier_sale_site.products p WHERE p.id = s.id)
+    """)
+    matched = dict(cur.fetchall())
+
+    assignments = ', '.join(f'{column} = COALESCE(s.{column}, p.{column})' for column in PATCH_COLUMNS)
+    changed = ' OR '.join(f'(s.{column} IS NOT NULL AND s.{column} IS DISTINCT FROM p.{column})' for column in PATCH_COLUMNS)
+    cur.execute(f"""
+        UPDATE t_p94134469_chandelier_sale_site.products p
+        SET {assignments}, updated_at = CURRENT_TIMESTAMP
+        FROM (
+            SELECT DISTINCT ON (id) * FROM products_patch
+            WHERE id IS NOT NULL
+            ORDER BY id, row_no DESC
+        ) s
+        WHERE p.id = s.id AND ({changed})
+        RETURNING s.row_no
+    """)
+    updated = {row_no for (row_no,) in cur.fetchall()}
+
+    last_row_for_id: Dict[int, int] = {}
+    for row_no, product_id in matched.items():
+        last_row_for_id[product_id] = max(row_no, last_row_for_id.get(product_id, row_no))
+
+    results = []
+    for row in rows:
+        row_no, _, article = row[:3]
+        product_id = matched.get(row_no)
+        if product_id is None:
+            status = 'not_found'
+        elif row_no in updated:
+            status = 'updated'
+        elif last_row_for_id[product_id] != row_no:
+            status = 'duplicate'
+        else:
+            status = 'unchanged'
+        results.append({'row': row_no, 'id': product_id if product_id is not None else row[1], 'article': article, 'status': status})
+    return results
@@ -0,0 +1,87 @@
+'''
+Response compression for JSON API functions.
+
+Bodies larger than COMPRESS_MIN_BYTES are compressed with brotli or gzip,
+whichever the client accepts (brotli only when the module is installed),
+and returned base64-encoded as the function runtime requires for binary bodies.
+
+Usage:
+    @compress_response
+    def handler(event, context):
+        ...
+'''
+import base64
+import functools
+import gzip
+import os
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESS_MIN_BYTES = int(os.environ.get('COMPRESS_MIN_BYTES', '1024'))
+GZIP_LEVEL = int(os.environ.get('COMPRESS_GZIP_LEVEL', '6'))
+BROTLI_QUALITY = int(os.environ.get('COMPRESS_BROTLI_QUALITY', '5'))
+
+
+def accepted_encodings(event: Dict[str, Any]) -> List[str]:
+    '''Encodings from Accept-Encoding with a non-zero q-value'''
+    headers = event.get('headers') or {}
+    header = next((value for key, value in headers.items() if key.lower() == 'accept-encoding'), '') or ''
+    encodings = []
+    for part in header.split(','):
+        name, _, params = part.strip().partition(';')
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name and q > 0:
+            encodings.append(name.strip().lower())
+    return encodings
+
+
+def choose_encoding(event: Dict[str, Any]) -> Optional[str]:
+    encodings = accepted_encodings(event)
+    if brotli is not None and ('br' in encodings or '*' in encodings):
+        return 'br'
+    if 'gzip' in encodings or '*' in encodings:
+        return 'gzip'
+    return None
+
+
+def compress_body(event: Dict[str, Any], response: Dict[str, Any]) -> Dict[str, Any]:
+    '''Compress a text response body in place if the client accepts it and it is large enough'''
+    body = response.get('body')
+    if not isinstance(body, str) or response.get('isBase64Encoded'):
+        return response
+
+    headers = response.setdefault('headers', {})
+    headers['Vary'] = 'Accept-Encoding'
+
+    raw = body.encode('utf-8')
+    encoding = choose_encoding(event)
+    if encoding is None or len(raw) < COMPRESS_MIN_BYTES:
+        return response
+
+    if encoding == 'br':
+        compressed = brotli.compress(raw, quality=BROTLI_QUALITY)
+    else:
+        compressed = gzip.compress(raw, compresslevel=GZIP_LEVEL)
+
+    headers['Content-Encoding'] = encoding
+    response['body'] = base64.b64encode(compressed).decode('ascii')
+    response['isBase64Encoded'] = True
+    return response
+
+
+def compress_response(handler: Callable[[Dict[str, Any], Any], Dict[str, Any]]) -> Callable[[Dict[str, Any], Any], Dict[str, Any]]:
+    '''Decorator applying compress_body to every response of a function handler'''
+    @functools.wraps(handler)
+    def wrapper(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+        return compress_body(event, handler(event, context))
+    return wrapper
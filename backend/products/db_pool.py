@@ -0,0 +1,113 @@
+'''
+Postgres connection pool kept at module level, so warm invocations of the
+function reuse already authenticated connections instead of reconnecting.
+
+Usage:
+    conn = get_connection()
+    try:
+        ...
+    finally:
+        release_connection(conn)
+'''
+import os
+import time
+from contextlib import contextmanager
+from typing import Iterator, List
+
+import psycopg2
+import psycopg2.extensions
+
+POOL_MAX_IDLE = int(os.environ.get('DB_POOL_MAX_IDLE', '2'))
+# Connections are recycled after this many seconds regardless of health
+POOL_MAX_LIFETIME = float(os.environ.get('DB_POOL_MAX_LIFETIME', '600'))
+# Connections idle for longer than this are pinged before being handed out
+POOL_CHECK_AFTER = float(os.environ.get('DB_POOL_CHECK_AFTER', '30'))
+
+
+class PooledConnection(psycopg2.extensions.connection):
+    '''Connection that tracks its age and server-side prepared statements'''
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.created_at = time.monotonic()
+        self.released_at = self.created_at
+        self.prepared = set()
+
+
+_idle: List[PooledConnection] = []
+
+
+def _connect() -> PooledConnection:
+    dsn = os.environ.get('DATABASE_URL')
+    if not dsn:
+        raise ValueError('DATABASE_URL not configured')
+    return psycopg2.connect(dsn, connection_factory=PooledConnection)
+
+
+def _discard(conn: PooledConnection) -> None:
+    try:
+        conn.close()
+    except psycopg2.Error:
+        pass
+
+
+def _is_healthy(conn: PooledConnection) -> bool:
+    if conn.closed:
+        return False
+    now = time.monotonic()
+    if now - conn.created_at > POOL_MAX_LIFETIME:
+        return False
+    if now - conn.released_at > POOL_CHECK_AFTER:
+        try:
+            cur = conn.cursor()
+            cur.execute('SELECT 1')
+            cur.close()
+            conn.rollback()
+        except psycopg2.Error:
+            return False
+    return True
+
+
+def get_connection() -> PooledConnection:
+    '''Take a healthy idle connection from the pool or open a new one'''
+    while _idle:
+        conn = _idle.pop()
+        if _is_healthy(conn):
+            return conn
+        _discard(conn)
+    return _connect()
+
+
+def release_connection(conn: PooledConnection) -> None:
+    '''Reset the session state and return the connection to the pool'''
+    if conn.closed:
+        return
+    try:
+        status = conn.info.transaction_status
+        if status == psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN:
+            _discard(conn)
+            return
+        if status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            conn.rollback()
+        if conn.autocommit:
+            conn.autocommit = False
+    except psycopg2.Error:
+        _discard(conn)
+        return
+
+    expired = time.monotonic() - conn.created_at > POOL_MAX_LIFETIME
+    if expired or len(_idle) >= POOL_MAX_IDLE:
+        _discard(conn)
+        return
+    conn.released_at = time.monotonic()
+    _idle.append(conn)
+
+
+@contextmanager
+def pooled_connection() -> Iterator[PooledConnection]:
+    '''Context manager form of get_connection/release_connection'''
+    conn = get_connection()
+    try:
+        yield conn
+    finally:
+        release_connection(conn)
@@ -1,7 +1,25 @@
+import base64
+import hashlib
+import io
 import json
 import os
-import psycopg2
-from typing import Dict, Any
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, Any, List, Optional, Tuple
+
+from bulk_import import (
+    IMPORT_MODES, copy_to_staging, create_job, load_job, load_job_chunks, load_payload, merge_staging, record_chunk,
+    store_payload, validate_products
+)
+from bulk_patch import apply_patches, validate_patches
+from compression import compress_response
+from db_pool import get_connection, release_connection
+from export import EXPORT_FORMATS, cdn_url, export_chunks, upload_multipart
+from json_stream import write_array
+from query_builder import build_filters, build_order, execute, listing_table, where_sql
+from serializer import CARD_VIEW, PRODUCT_FIELDS, Field, dumps, row_mapper
 
 def escape_sql(value: Any) -> str:
     '''Escape value for SQL injection safety'''
@@ -17,6 +35,114 @@ def escape_sql(value: Any) -> str:
         return "'" + json.dumps(value).replace("'", "''") + "'"
     return "'" + str(value).replace("'", "''") + "'"
 
+class DecimalEncoder(json.JSONEncoder):
+    '''JSON encoder for NUMERIC and timestamp columns returned by RETURNING *'''
+    def default(self, o):
+        if isinstance(o, Decimal):
+            return float(o)
+        if isinstance(o, (date, datetime)):
+            return o.isoformat()
+        return super().default(o)
+
+class LRUCache:
+    '''
+    Bounded LRU with a per-entry TTL.
+    Lives at module level, so it survives between warm invocations of the function.
+    '''
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries: 'OrderedDict[Any, Tuple[float, Any]]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key: Any) -> Optional[Any]:
+        entry = self.entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self.entries[key]
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+    
+    def put(self, key: Any, value: Any) -> None:
+        if self.max_size <= 0:
+            return
+        self.entries[key] = (time.monotonic() + self.ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+    
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self.entries),
+            'maxSize': self.max_size,
+            'ttl': self.ttl,
+            'hitRatio': round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+# Serialized GET bodies keyed by catalog version and normalized query
+response_cache = LRUCache(
+    max_size=int(os.environ.get('PRODUCTS_CACHE_SIZE', '256')),
+    ttl=float(os.environ.get('PRODUCTS_CACHE_TTL', '60'))
+)
+
+# Row counts keyed by catalog version and filter signature, used by ?count=cached
+count_cache = LRUCache(
+    max_size=int(os.environ.get('PRODUCTS_COUNT_CACHE_SIZE', '1024')),
+    ttl=float(os.environ.get('PRODUCTS_COUNT_CACHE_TTL', '600'))
+)
+
+# Parameters whose comma-separated values are order-insensitive, besides attr[key] filters
+LIST_PARAMS = ('brands', 'styles', 'colors', 'fields')
+
+def normalize_params(params: Dict[str, Any]) -> Tuple[Tuple[str, str], ...]:
+    '''Canonical form of query parameters so equivalent requests share a cache entry'''
+    normalized = []
+    for key, value in params.items():
+        if value is None or value == '':
+            continue
+        value = str(value)
+        if key in LIST_PARAMS or key.startswith('attr['):
+            value = ','.join(sorted(v for v in value.split(',') if v))
+        normalized.append((key, value))
+    return tuple(sorted(normalized))
+
+def get_catalog_version(cur) -> int:
+    '''Current products catalog version; every committed write to products bumps the V0049 sequence'''
+    cur.execute("SELECT last_value FROM t_p94134469_chandelier_sale_site.products_catalog_version_seq")
+    row = cur.fetchone()
+    return row[0] if row else 0
+
+def get_header(event: Dict[str, Any], name: str) -> str:
+    headers = event.get('headers') or {}
+    return next((value for key, value in headers.items() if key.lower() == name.lower()), '') or ''
+
+def make_etag(catalog_version: int, normalized: Tuple[Tuple[str, str], ...]) -> str:
+    '''
+    Validator for a GET response: the body depends only on the catalog version and the query.
+    Weak, because plain and compressed bodies share it.
+    '''
+    digest = hashlib.sha1(repr(normalized).encode('utf-8')).hexdigest()[:16]
+    return f'W/"{catalog_version}-{digest}"'
+
+def etag_matches(event: Dict[str, Any], etag: str) -> bool:
+    '''Weak comparison against If-None-Match'''
+    header = get_header(event, 'If-None-Match').strip()
+    if header == '*':
+        return True
+    tags = [tag.strip() for tag in header.split(',')]
+    return any((tag[2:] if tag.startswith('W/') else tag) == etag[2:] for tag in tags)
+
+@compress_response
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     '''
     Business: Manage products - get, create, update, delete
@@ -30,15 +156,15 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'statusCode': 200,
             'headers': {
                 'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type, Cache-Control',
+                'Access-Control-Allow-Methods': 'GET, POST, PUT, PATCH, DELETE, OPTIONS',
+                'Access-Control-Allow-Headers': 'Content-Type, Cache-Control, If-None-Match',
                 'Access-Control-Max-Age': '86400'
             },
             'body': '',
             'isBase64Encoded': False
         }
     
-    conn = psycopg2.connect(os.environ['DATABASE_URL'])
+    conn = get_connection()
     cur = conn.cursor()
     
     try:
@@ -58,6 +184,8 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             return handle_post(event, cur, conn)
         elif method == 'PUT':
             return handle_put(event, cur, conn)
+        elif method == 'PATCH':
+            return handle_bulk_patch(event, cur, conn)
         elif method == 'DELETE':
             return handle_delete(event, cur, conn)
         else:
@@ -69,181 +197,493 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             }
     except Exception as e:
         cur.close()
-        conn.close()
         return {
             'statusCode': 500,
             'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
             'body': json.dumps({'error': str(e)}),
             'isBase64Encoded': False
         }
+    finally:
+        release_connection(conn)
+
+def encode_cursor(values: List[Any]) -> str:
+    '''Pack the sort key of the last row into an opaque url-safe token'''
+    # Prices and timestamps travel as strings; the server casts them back when comparing with the sort keys
+    raw = json.dumps(values, separators=(',', ':'), default=str).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(token: str) -> List[Any]:
+    '''Unpack a token produced by encode_cursor, raise ValueError if it is malformed'''
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except Exception:
+        raise ValueError('Invalid cursor')
+    if not isinstance(values, list) or not values:
+        raise ValueError('Invalid cursor')
+    return values
+
+def select_fields(params: Dict[str, Any]) -> List[Field]:
+    '''
+    Resolve the projection from ?fields=a,b,c (sparse fieldset) or ?view=card|full.
+    Full view is the default; id is always included because cursors are built from it.
+    '''
+    if params.get('fields'):
+        requested = {f.strip() for f in params['fields'].split(',') if f.strip()}
+        unknown = requested - {key for key, _, _ in PRODUCT_FIELDS}
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+        requested.add('id')
+        return [field for field in PRODUCT_FIELDS if field[0] in requested]
+    
+    view = params.get('view', 'full')
+    if view == 'card':
+        return CARD_VIEW
+    if view != 'full':
+        raise ValueError('view must be card or full')
+    return PRODUCT_FIELDS
 
 def handle_get(event: Dict[str, Any], cur, conn) -> Dict[str, Any]:
     params = event.get('queryStringParameters') or {}
-    product_id = params.get('id')
-    brands = params.get('brands', '').split(',') if params.get('brands') else []
-    product_type = params.get('type')
-    category = params.get('category')
-    min_price = params.get('min_price')
-    max_price = params.get('max_price')
-    search = params.get('search', '')
-    has_remote = params.get('has_remote')
-    is_dimmable = params.get('is_dimmable')
-    has_color_change = params.get('has_color_change')
-    is_sale = params.get('is_sale')
-    is_new = params.get('is_new')
-    pickup_available = params.get('pickup_available')
-    styles = params.get('styles', '').split(',') if params.get('styles') else []
-    colors = params.get('colors', '').split(',') if params.get('colors') else []
+    action = params.get('action')
+    
+    if action == 'cache_stats':
+        cur.close()
+        return {
+            'statusCode': 200,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*', 'Cache-Control': 'no-store'},
+            'body': json.dumps({'responses': response_cache.stats(), 'counts': count_cache.stats()}),
+            'isBase64Encoded': False
+        }
+    
+    # Exports are too large for the response cache and are never revalidated;
+    # import progress changes without a catalog version bump
+    if action in ('export', 'import_status'):
+        try:
+            if action == 'import_status':
+                return handle_import_status(params, cur)
+            return handle_export(params, cur, conn)
+        except ValueError as e:
+            cur.close()
+            return {
+                'statusCode': 400,
+                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                'body': json.dumps({'error': str(e)}),
+                'isBase64Encoded': False
+            }
+    
+    catalog_version = get_catalog_version(cur)
+    normalized = normalize_params(params)
+    etag = make_etag(catalog_version, normalized)
+    
+    # Revalidation of an unchanged catalog costs only the version lookup above
+    if etag_matches(event, etag):
+        cur.close()
+        return {
+            'statusCode': 304,
+            'headers': {
+                'Access-Control-Allow-Origin': '*',
+                'Cache-Control': 'public, max-age=300',
+                'ETag': etag
+            },
+            'body': '',
+            'isBase64Encoded': False
+        }
+    
+    cache_key = (catalog_version, normalized)
+    cached_body = response_cache.get(cache_key)
+    if cached_body is not None:
+        cur.close()
+        return {
+            'statusCode': 200,
+            'headers': {
+                'Content-Type': 'application/json',
+                'Access-Control-Allow-Origin': '*',
+                'Cache-Control': 'public, max-age=300',
+                'ETag': etag,
+                'X-Cache': 'HIT'
+            },
+            'body': cached_body,
+            'isBase64Encoded': False
+        }
+    
+    try:
+        if action == 'facets':
+            response = handle_facets(params, cur, conn)
+        elif action == 'suggest':
+            response = handle_suggest(params, cur)
+        elif params.get('ids'):
+            response = handle_batch(params, cur)
+        else:
+            response = handle_list(params, cur, conn, catalog_version)
+    except ValueError as e:
+        cur.close()
+        return {
+            'statusCode': 400,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': str(e)}),
+            'isBase64Encoded': False
+        }
+    
+    if response['statusCode'] == 200:
+        response_cache.put(cache_key, response['body'])
+        response['headers']['ETag'] = etag
+        response['headers']['X-Cache'] = 'MISS'
+    return response
+
+COUNT_MODES = ('exact', 'estimate', 'cached', 'none')
+
+# Pages of at least this many rows are streamed from a server-side cursor
+STREAM_MIN_ROWS = int(os.environ.get('PRODUCTS_STREAM_MIN_ROWS', '200'))
+
+def count_products(cur, table: str, where: str, values: Dict[str, Any], mode: str, catalog_version: int) -> Optional[int]:
+    '''
+    Total for the listing according to ?count=:
+    exact - COUNT(*) over the filtered set;
+    estimate - planner row estimate, no scan, may be off for selective filters;
+    cached - exact count remembered per filter signature until the catalog changes;
+    none - no count, the client relies on hasMore.
+    '''
+    if mode == 'none':
+        return None
+    
+    if mode == 'estimate':
+        cur.execute(f"EXPLAIN (FORMAT JSON) SELECT 1 FROM t_p94134469_chandelier_sale_site.{table} WHERE {where}", values)
+        plan = cur.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+    
+    cache_key = (catalog_version, where, json.dumps(values, sort_keys=True, default=str))
+    if mode == 'cached':
+        cached = count_cache.get(cache_key)
+        if cached is not None:
+            return cached
+    
+    execute(cur, f"SELECT COUNT(*) FROM t_p94134469_chandelier_sale_site.{table} WHERE {where}", values)
+    total = cur.fetchone()[0]
+    count_cache.put(cache_key, total)
+    return total
+
+def handle_list(params: Dict[str, Any], cur, conn, catalog_version: int) -> Dict[str, Any]:
     limit = int(params.get('limit', '20'))
     offset = int(params.get('offset', '0'))
+    after = params.get('after')
     
+    if limit < 1:
+        raise ValueError('limit must be at least 1')
+    if offset < 0:
+        raise ValueError('offset must not be negative')
     if limit > 1000:
         limit = 1000
     
-    query = "SELECT * FROM t_p94134469_chandelier_sale_site.products WHERE 1=1"
-    count_query = "SELECT COUNT(*) FROM t_p94134469_chandelier_sale_site.products WHERE 1=1"
+    fields = select_fields(params)
+    columns = ', '.join(column for _, column, _ in fields)
     
-    if product_id:
-        query += f" AND id = {int(product_id)}"
-        count_query += f" AND id = {int(product_id)}"
+    count_mode = params.get('count', 'exact')
+    if count_mode not in COUNT_MODES:
+        raise ValueError(f"count must be one of: {', '.join(COUNT_MODES)}")
     
-    if search:
-        search_term = search.replace("'", "''")
-        query += f" AND (name ILIKE '%{search_term}%' OR brand ILIKE '%{search_term}%' OR type ILIKE '%{search_term}%')"
-        count_query += f" AND (name ILIKE '%{search_term}%' OR brand ILIKE '%{search_term}%' OR type ILIKE '%{search_term}%')"
+    filters = build_filters(params)
+    where, values = where_sql(filters)
+    sort_keys, descending, order_values = build_order(params)
+    # Grid pages and plain filters are answered from the narrow product_cards table
+    table = listing_table(filters, [column for _, column, _ in fields])
     
-    if brands:
-        brands_escaped = [escape_sql(b) for b in brands if b]
-        if brands_escaped:
-            query += f" AND brand IN ({','.join(brands_escaped)})"
-            count_query += f" AND brand IN ({','.join(brands_escaped)})"
+    total_count = count_products(cur, table, where, values, count_mode, catalog_version)
     
-    if category:
-        query += f" AND category = {escape_sql(category)}"
-        count_query += f" AND category = {escape_sql(category)}"
+    values = {**values, **order_values, 'limit': limit + 1}
     
-    if product_type:
-        query += f" AND type = {escape_sql(product_type)}"
-        count_query += f" AND type = {escape_sql(product_type)}"
+    # Keyset mode: seek past the sort key of the previous page's last row instead of skipping rows
+    seek = ''
+    if after:
+        last_values = decode_cursor(after)
+        if len(last_values) != len(sort_keys):
+            raise ValueError('Invalid cursor')
+        placeholders = []
+        for i, value in enumerate(last_values):
+            values[f'after_{i}'] = value
+            placeholders.append(f'%(after_{i})s')
+        seek = f" AND ({', '.join(sort_keys)}) {'<' if descending else '>'} ({', '.join(placeholders)})"
     
-    if min_price:
-        query += f" AND price >= {float(min_price)}"
-        count_query += f" AND price >= {float(min_price)}"
+    # Sort keys are selected after the projection so the cursor can be built from the last row.
+    # One extra row tells whether another page exists without a second query.
+    # Values are bound as parameters, so the statement text depends only on the filter shape.
+    direction = ' DESC' if descending else ''
+    query = (
+        f"SELECT {columns}, {', '.join(sort_keys)} FROM t_p94134469_chandelier_sale_site.{table} "
+        f"WHERE {where}{seek} ORDER BY {', '.join(key + direction for key in sort_keys)} LIMIT %(limit)s"
+    )
+    if not after and offset:
+        query += " OFFSET %(offset)s"
+        values['offset'] = offset
     
-    if max_price:
-        query += f" AND price <= {float(max_price)}"
-        count_query += f" AND price <= {float(max_price)}"
+    # Large pages are read through a server-side cursor, which cannot run prepared statements.
+    # Either way rows are encoded into the body batch by batch instead of as one list of dicts.
+    if limit >= STREAM_MIN_ROWS:
+        rows_cur = conn.cursor(name='products_page')
+        rows_cur.execute(query, values)
+    else:
+        rows_cur = cur
+        execute(cur, query, values)
     
-    if has_remote and has_remote.lower() == 'true':
-        query += " AND has_remote = TRUE"
-        count_query += " AND has_remote = TRUE"
+    def encode_batch(rows: List[tuple]) -> str:
+        map_row = row_mapper(fields, rows_cur.description)
+        return dumps([map_row(row) for row in rows])
     
-    if is_dimmable and is_dimmable.lower() == 'true':
-        query += " AND is_dimmable = TRUE"
-        count_query += " AND is_dimmable = TRUE"
+    body = io.StringIO()
+    body.write('{"products":')
+    _, last_row, has_more = write_array(body, rows_cur, encode_batch, limit=limit)
+    next_cursor = encode_cursor(list(last_row[len(fields):])) if has_more and last_row is not None else None
+    body.write(',' + dumps({
+        'total': total_count,
+        'countMode': count_mode,
+        'hasMore': has_more,
+        'nextCursor': next_cursor
+    })[1:])
     
-    if has_color_change and has_color_change.lower() == 'true':
-        query += " AND has_color_change = TRUE"
-        count_query += " AND has_color_change = TRUE"
+    if rows_cur is not cur:
+        rows_cur.close()
+    cur.close()
     
-    if is_sale and is_sale.lower() == 'true':
-        query += " AND is_sale = TRUE"
-        count_query += " AND is_sale = TRUE"
+    return {
+        'statusCode': 200,
+        'headers': {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*',
+            'Cache-Control': 'public, max-age=300'
+        },
+        'body': body.getvalue(),
+        'isBase64Encoded': False
+    }
+
+# Upper bounds of the price bands shown in the catalog sidebar, in rubles
+PRICE_BANDS = [0, 5000, 10000, 20000, 50000, 100000]
+
+FACET_GROUPS = ['brand', 'style', 'color', 'category', 'price']
+
+def handle_facets(params: Dict[str, Any], cur, conn) -> Dict[str, Any]:
+    '''
+    Count in-stock products per brand, style, color, category and price band.
+    Counting is disjunctive: a facet's own selection is ignored for its counts,
+    so the sidebar can show how many items each alternative option would add.
+    All facets are computed from a single scan of the filtered set.
+    '''
+    filters = build_filters(params)
+    common = [f for f in filters if f[0] not in FACET_GROUPS]
+    common_where, values = where_sql(common)
+    bands = ','.join(str(b) for b in PRICE_BANDS)
     
-    if is_new and is_new.lower() == 'true':
-        query += " AND is_new = TRUE"
-        count_query += " AND is_new = TRUE"
+    match_columns = []
+    for group in FACET_GROUPS:
+        clause, group_values = where_sql([f for f in filters if f[0] == group])
+        match_columns.append(f"({clause}) AS m_{group}")
+        values.update(group_values)
     
-    if pickup_available and pickup_available.lower() == 'true':
-        query += " AND pickup_available = TRUE"
-        count_query += " AND pickup_available = TRUE"
+    def others(group: str) -> str:
+        return ' AND '.join(f"m_{g}" for g in FACET_GROUPS if g != group)
     
-    if styles:
-        styles_escaped = [escape_sql(s) for s in styles if s]
-        if styles_escaped:
-            query += f" AND style IN ({','.join(styles_escaped)})"
-            count_query += f" AND style IN ({','.join(styles_escaped)})"
+    selects = []
+    for group in FACET_GROUPS:
+        column = 'price_band' if group == 'price' else group
+        selects.append(
+            f"SELECT '{group}', {column}::text, COUNT(*) FROM base "
+            f"WHERE {others(group)} AND {column} IS NOT NULL GROUP BY {column}"
+        )
+    selects.append(f"SELECT 'total', NULL, COUNT(*) FROM base WHERE {' AND '.join(f'm_{g}' for g in FACET_GROUPS)}")
     
-    if colors:
-        colors_escaped = [escape_sql(c) for c in colors if c]
-        if colors_escaped:
-            query += f" AND color IN ({','.join(colors_escaped)})"
-            count_query += f" AND color IN ({','.join(colors_escaped)})"
+    query = f"""
+    WITH base AS (
+        SELECT brand, style, color, category,
+               width_bucket(price, ARRAY[{bands}]::numeric[]) AS price_band,
+               {', '.join(match_columns)}
+        FROM t_p94134469_chandelier_sale_site.{listing_table(filters, ['brand', 'style', 'color', 'category', 'price'])}
+        WHERE {common_where}
+    )
+    {' UNION ALL '.join(selects)}
+    """
     
-    query += " AND in_stock = TRUE"
-    count_query += " AND in_stock = TRUE"
+    execute(cur, query, values)
+    rows = cur.fetchall()
+    cur.close()
     
-    cur.execute(count_query)
-    total_count = cur.fetchone()[0]
+    facets: Dict[str, List[Dict[str, Any]]] = {group: [] for group in FACET_GROUPS}
+    total = 0
+    for group, value, count in rows:
+        if group == 'total':
+            total = count
+        elif group == 'price':
+            band = int(value)
+            if band < 1:
+                continue
+            facets['price'].append({
+                'from': PRICE_BANDS[band - 1],
+                'to': PRICE_BANDS[band] if band < len(PRICE_BANDS) else None,
+                'count': count
+            })
+        else:
+            facets[group].append({'value': value, 'count': count})
     
-    query += f" ORDER BY id LIMIT {limit} OFFSET {offset}"
+    for group in FACET_GROUPS:
+        if group == 'price':
+            facets[group].sort(key=lambda item: item['from'])
+        else:
+            facets[group].sort(key=lambda item: (-item['count'], item['value']))
     
-    cur.execute(query)
+    return {
+        'statusCode': 200,
+        'headers': {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*',
+            'Cache-Control': 'public, max-age=300'
+        },
+        'body': json.dumps({'facets': facets, 'total': total}),
+        'isBase64Encoded': False
+    }
+
+EXPORT_TARGETS = ('response', 's3')
+# target=response holds the whole file in the function's response, which the platform limits to about 3.5 MB;
+# larger exports are refused with 413 and have to use target=s3
+EXPORT_RESPONSE_MAX_BYTES = int(os.environ.get('PRODUCTS_EXPORT_RESPONSE_MAX_BYTES', str(3 * 1024 * 1024)))
+
+def handle_export(params: Dict[str, Any], cur, conn) -> Dict[str, Any]:
+    '''
+    Dump every product matching the listing filters: ?action=export&format=ndjson|csv&target=response|s3.
+    Unlike the listing, out-of-stock products are included when ?include_out_of_stock=true.
+    Rows are streamed in id order from a server-side cursor; target=s3 uploads the file in parts
+    and returns its URL, which keeps memory flat for any catalog size. target=response is capped
+    at EXPORT_RESPONSE_MAX_BYTES.
+    '''
+    fmt = params.get('format', 'ndjson')
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+    target = params.get('target', 'response')
+    if target not in EXPORT_TARGETS:
+        raise ValueError(f"target must be one of: {', '.join(EXPORT_TARGETS)}")
+    
+    fields = select_fields(params)
+    columns = ', '.join(column for _, column, _ in fields)
+    filters = build_filters(params)
+    if params.get('include_out_of_stock') == 'true':
+        filters = [f for f in filters if f[0] != 'in_stock']
+    where, values = where_sql(filters)
+    
+    export_cur = conn.cursor(name='products_export')
+    export_cur.execute(f"SELECT {columns} FROM t_p94134469_chandelier_sale_site.products WHERE {where} ORDER BY id", values)
+    stats = {'rows': 0}
+    chunks = export_chunks(export_cur, fields, fmt, stats)
+    filename = f"products-{time.strftime('%Y%m%d-%H%M%S')}.{fmt}"
+    
+    if target == 's3':
+        key = f'exports/{filename}'
+        size = upload_multipart(chunks, key, EXPORT_FORMATS[fmt])
+        export_cur.close()
+        cur.close()
+        return {
+            'statusCode': 200,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*', 'Cache-Control': 'no-store'},
+            'body': json.dumps({'url': cdn_url(key), 'key': key, 'rows': stats['rows'], 'bytes': size}),
+            'isBase64Encoded': False
+        }
+    
+    parts: List[str] = []
+    size = 0
+    for chunk in chunks:
+        size += len(chunk.encode('utf-8'))
+        if size > EXPORT_RESPONSE_MAX_BYTES:
+            export_cur.close()
+            cur.close()
+            return {
+                'statusCode': 413,
+                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                'body': json.dumps({
+                    'error': f'Export exceeds {EXPORT_RESPONSE_MAX_BYTES} bytes, use target=s3',
+                    'maxBytes': EXPORT_RESPONSE_MAX_BYTES
+                }),
+                'isBase64Encoded': False
+            }
+        parts.append(chunk)
+    body = ''.join(parts)
+    export_cur.close()
+    cur.close()
+    return {
+        'statusCode': 200,
+        'headers': {
+            'Content-Type': EXPORT_FORMATS[fmt],
+            'Content-Disposition': f'attachment; filename="{filename}"',
+            'Access-Control-Allow-Origin': '*',
+            'Cache-Control': 'no-store',
+            'X-Export-Rows': str(stats['rows'])
+        },
+        'body': body,
+        'isBase64Encoded': False
+    }
+
+BATCH_MAX_IDS = int(os.environ.get('PRODUCTS_BATCH_MAX_IDS', '100'))
+
+def handle_batch(params: Dict[str, Any], cur) -> Dict[str, Any]:
+    '''
+    Look up several products at once for carts, favorites and recently viewed lists: ?ids=3,1,2.
+    Products come back in the requested order, out-of-stock ones included; unknown ids are listed in `missing`.
+    '''
+    try:
+        ids = list(dict.fromkeys(int(v) for v in params['ids'].split(',') if v.strip()))
+    except ValueError:
+        raise ValueError('ids must be a comma-separated list of integers')
+    if len(ids) > BATCH_MAX_IDS:
+        raise ValueError(f'At most {BATCH_MAX_IDS} ids per request')
+    
+    fields = select_fields(params)
+    columns = ', '.join(column for _, column, _ in fields)
+    execute(cur, (
+        f"SELECT {columns} FROM t_p94134469_chandelier_sale_site.products "
+        f"WHERE id = ANY(%(ids)s) ORDER BY array_position(%(ids)s, id)"
+    ), {'ids': ids})
     rows = cur.fetchall()
+    map_row = row_mapper(fields, cur.description)
+    products = [map_row(row) for row in rows]
+    
+    cur.close()
+    
+    found = {product['id'] for product in products}
+    return {
+        'statusCode': 200,
+        'headers': {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*',
+            'Cache-Control': 'public, max-age=300'
+        },
+        'body': dumps({'products': products, 'missing': [i for i in ids if i not in found]}),
+        'isBase64Encoded': False
+    }
+
+SUGGEST_MAX_LIMIT = 20
+
+def handle_suggest(params: Dict[str, Any], cur) -> Dict[str, Any]:
+    '''
+    Search-as-you-type: most frequent names, brands, collections and articles starting with ?q=.
+    Served by a prefix range scan over product_suggestions, which triggers keep in sync with products;
+    repeated prefixes are answered from the response cache.
+    '''
+    prefix = params.get('q', '').strip()
+    limit = min(int(params.get('limit', '8')), SUGGEST_MAX_LIMIT)
+    if limit < 1:
+        raise ValueError('limit must be at least 1')
     
-    col_names = [desc[0] for desc in cur.description]
-    
-    products = []
-    for row in rows:
-        product_dict = dict(zip(col_names, row))
-        products.append({
-            'id': product_dict['id'],
-            'name': product_dict['name'],
-            'description': product_dict.get('description'),
-            'price': float(product_dict['price']) if product_dict.get('price') is not None else 0.0,
-            'brand': product_dict['brand'],
-            'type': product_dict['type'],
-            'image': product_dict['image_url'],
-            'inStock': product_dict.get('in_stock', True),
-            'rating': float(product_dict['rating']) if product_dict.get('rating') is not None else 5.0,
-            'reviews': int(product_dict['reviews']) if product_dict.get('reviews') is not None else 0,
-            'hasRemote': bool(product_dict.get('has_remote', False)),
-            'isDimmable': bool(product_dict.get('is_dimmable', False)),
-            'hasColorChange': bool(product_dict.get('has_color_change', False)),
-            'article': product_dict.get('article'),
-            'brandCountry': product_dict.get('brand_country'),
-            'manufacturerCountry': product_dict.get('manufacturer_country'),
-            'collection': product_dict.get('collection'),
-            'style': product_dict.get('style'),
-            'lampType': product_dict.get('lamp_type'),
-            'socketType': product_dict.get('socket_type'),
-            'bulbType': product_dict.get('bulb_type'),
-            'lampCount': product_dict.get('lamp_count'),
-            'lampPower': product_dict.get('lamp_power'),
-            'totalPower': product_dict.get('total_power'),
-            'lightingArea': product_dict.get('lighting_area'),
-            'voltage': product_dict.get('voltage'),
-            'color': product_dict.get('color'),
-            'height': product_dict.get('height'),
-            'diameter': product_dict.get('diameter'),
-            'length': product_dict.get('length'),
-            'width': product_dict.get('width'),
-            'depth': product_dict.get('depth'),
-            'chainLength': product_dict.get('chain_length'),
-            'materials': product_dict.get('materials'),
-            'frameMaterial': product_dict.get('frame_material'),
-            'shadeMaterial': product_dict.get('shade_material'),
-            'frameColor': product_dict.get('frame_color'),
-            'shadeColor': product_dict.get('shade_color'),
-            'shadeDirection': product_dict.get('shade_direction'),
-            'diffuserType': product_dict.get('diffuser_type'),
-            'diffuserShape': product_dict.get('diffuser_shape'),
-            'ipRating': product_dict.get('ip_rating'),
-            'interior': product_dict.get('interior'),
-            'place': product_dict.get('place'),
-            'suspendedCeiling': product_dict.get('suspended_ceiling'),
-            'mountType': product_dict.get('mount_type'),
-            'officialWarranty': product_dict.get('official_warranty'),
-            'shopWarranty': product_dict.get('shop_warranty'),
-            'section': product_dict.get('section'),
-            'catalog': product_dict.get('catalog'),
-            'subcategory': product_dict.get('subcategory'),
-            'category': product_dict.get('category'),
-            'images': product_dict.get('images') if isinstance(product_dict.get('images'), list) else (json.loads(product_dict.get('images', '[]') or '[]') if product_dict.get('images') else [])
-        })
+    suggestions = []
+    if prefix:
+        pattern = prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        # Not prepared: a generic plan cannot turn LIKE $1 into an index range scan
+        cur.execute("""
+            SELECT kind, term, weight
+            FROM t_p94134469_chandelier_sale_site.product_suggestions
+            WHERE term_norm LIKE lower(%(pattern)s)
+            ORDER BY weight DESC, term
+            LIMIT %(limit)s
+        """, {'pattern': pattern, 'limit': limit})
+        suggestions = [{'kind': kind, 'value': term, 'count': weight} for kind, term, weight in cur.fetchall()]
     
     cur.close()
-    conn.close()
     
     return {
         'statusCode': 200,
@@ -252,16 +692,16 @@ def handle_get(event: Dict[str, Any], cur, conn) -> Dict[str, Any]:
             'Access-Control-Allow-Origin': '*',
             'Cache-Control': 'public, max-age=300'
         },
-        'body': json.dumps({'products': products, 'total': total_count}),
+        'body': json.dumps({'suggestions': suggestions}),
         'isBase64Encoded': False
     }
 
 def handle_post(event: Dict[str, Any], cur, conn) -> Dict[str, Any]:
     body = json.loads(event.get('body', '{}'))
     
-    # Check if bulk import
-    if 'products' in body and isinstance(body['products'], list):
-        return handle_bulk_import(body['products'], cur, conn)
+    # Check if bulk import (a resumed import sends only jobId)
+    if isinstance(body.get('products'), list) or body.get('jobId'):
+        return handle_bulk_import(body, cur, conn)
     
     name = body.get('name')
     price = body.get('price')
@@ -271,7 +711,6 @@ def handle_post(event: Dict[str, Any], cur, conn) -> Dict[str, Any]:
     
     if not all([name, brand, product_type]) or price is None:
         cur.close()
-        conn.close()
         return {
             'statusCode': 400,
             'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
@@ -356,7 +795,6 @@ def handle_post(event: Dict[str, Any], cur, conn) -> Dict[str, Any]:
     product_id = cur.fetchone()[0]
     conn.commit()
     cur.close()
-    conn.close()
     
     return {
         'statusCode': 201,
@@ -371,7 +809,6 @@ def handle_put(event: Dict[str, Any], cur, conn) -> Dict[str, Any]:
     
     if not product_id:
         cur.close()
-        conn.close()
         return {
             'statusCode': 400,
             'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
@@ -444,7 +881,6 @@ def handle_put(event: Dict[str, Any], cur, conn) -> Dict[str, Any]:
     
     if not updates:
         cur.close()
-        conn.close()
         return {
             'statusCode': 400,
             'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
@@ -456,11 +892,11 @@ def handle_put(event: Dict[str, Any], cur, conn) -> Dict[str, Any]:
     
     cur.execute(query)
     updated_product = cur.fetchone()
+    columns = [desc[0] for desc in cur.description]
     conn.commit()
     
     if not updated_product:
         cur.close()
-        conn.close()
         return {
             'statusCode': 404,
             'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
@@ -468,11 +904,9 @@ def handle_put(event: Dict[str, Any], cur, conn) -> Dict[str, Any]:
             'isBase64Encoded': False
         }
     
-    columns = [desc[0] for desc in cur.description]
     product_data = dict(zip(columns, updated_product))
     
     cur.close()
-    conn.close()
     
     return {
         'statusCode': 200,
@@ -487,7 +921,6 @@ def handle_delete(event: Dict[str, Any], cur, conn) -> Dict[str, Any]:
     
     if not product_id:
         cur.close()
-        conn.close()
         return {
             'statusCode': 400,
             'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
@@ -500,7 +933,6 @@ def handle_delete(event: Dict[str, Any], cur, conn) -> Dict[str, Any]:
     cur.execute(query)
     conn.commit()
     cur.close()
-    conn.close()
     
     return {
         'statusCode': 200,
@@ -515,7 +947,6 @@ def handle_bulk_delete(event: Dict[str, Any], cur, conn) -> Dict[str, Any]:
     
     if not ids:
         cur.close()
-        conn.close()
         return {
             'statusCode': 400,
             'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
@@ -530,7 +961,6 @@ def handle_bulk_delete(event: Dict[str, Any], cur, conn) -> Dict[str, Any]:
     deleted_count = cur.rowcount
     conn.commit()
     cur.close()
-    conn.close()
     
     return {
         'statusCode': 200,
@@ -539,159 +969,254 @@ def handle_bulk_delete(event: Dict[str, Any], cur, conn) -> Dict[str, Any]:
         'isBase64Encoded': False
     }
 
-def handle_bulk_import(products: list, cur, conn) -> Dict[str, Any]:
-    '''Массовый импорт товаров через единый INSERT (без циклов)'''
-    if not products:
+# Per-row validation errors returned by a bulk import
+IMPORT_MAX_ROW_ERRORS = 1000
+IMPORT_CHUNK_SIZE = int(os.environ.get('PRODUCTS_IMPORT_CHUNK_SIZE', '1000'))
+IMPORT_MAX_CHUNK_SIZE = 20000
+# Seconds of work per invocation; an unfinished job is continued by the next request with its jobId
+IMPORT_TIME_BUDGET = float(os.environ.get('PRODUCTS_IMPORT_TIME_BUDGET', '20'))
+
+def handle_bulk_import(body: Dict[str, Any], cur, conn) -> Dict[str, Any]:
+    '''
+    Массовый импорт кусками по chunkSize строк, каждый кусок в своей транзакции:
+    проверка строк, COPY во временную таблицу и INSERT ... ON CONFLICT по артикулу.
+    mode=upsert обновляет существующие артикулы (только если данные изменились), mode=insert их пропускает.
+    Товары задания хранятся в import_job_payloads, прогресс — в import_jobs.
+    Большой набор загружается частями: первый запрос с totalRows создаёт задание, следующие
+    передают jobId, offset и товары (каждая часть, кроме последней, кратна chunkSize).
+    Если время вызова вышло, ответ 202 с jobId, и запрос только с jobId продолжает импорт
+    с первого необработанного куска
+    '''
+    products = body.get('products') or []
+    mode = body.get('mode', 'upsert')
+    job_id = body.get('jobId')
+    try:
+        chunk_size = int(body.get('chunkSize', IMPORT_CHUNK_SIZE))
+        total_rows = int(body.get('totalRows', len(products)))
+        offset = int(body['offset']) if body.get('offset') is not None else None
+    except (TypeError, ValueError):
+        chunk_size, total_rows, offset = 0, 0, -1
+    
+    error = None
+    if not isinstance(products, list):
+        error = 'products must be a list'
+    elif not job_id and not products:
+        error = 'No products provided'
+    elif mode not in IMPORT_MODES:
+        error = f"mode must be one of: {', '.join(IMPORT_MODES)}"
+    elif not 0 < chunk_size <= IMPORT_MAX_CHUNK_SIZE:
+        error = f'chunkSize must be between 1 and {IMPORT_MAX_CHUNK_SIZE}'
+    elif not job_id and total_rows < len(products):
+        error = 'totalRows must not be less than the number of products'
+    elif offset is not None and offset < 0:
+        error = 'offset must be a non-negative integer'
+    if error:
         cur.close()
-        conn.close()
         return {
             'statusCode': 400,
             'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({'error': 'No products provided'}),
+            'body': json.dumps({'error': error}),
             'isBase64Encoded': False
         }
     
-    # Подготовка VALUES для массового INSERT
-    values_parts = []
-    error_count = 0
-    errors = []
+    if job_id:
+        job = load_job(cur, int(job_id), lock=True)
+        if not job:
+            cur.close()
+            return {
+                'statusCode': 404,
+                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                'body': json.dumps({'error': 'Задание импорта не найдено'}),
+                'isBase64Encoded': False
+            }
+        offset = job['uploaded_rows'] if offset is None else offset
+    else:
+        job = create_job(cur, mode, total_rows, chunk_size)
+        offset = 0
     
-    for product in products:
-        name = product.get('name')
-        price = product.get('price')
-        brand = product.get('brand')
-        product_type = product.get('type')
-        
-        if not all([name, brand, product_type]) or price is None:
-            error_count += 1
-            errors.append(f"Пропущено: {name or 'Без названия'} - отсутствуют обязательные поля")
+    if products:
+        # Часть должна начинаться на границе куска, без пропусков после уже загруженных строк,
+        # и быть кратной chunkSize, если это не последняя часть
+        end = offset + len(products)
+        if (offset % job['chunk_size'] or offset > job['uploaded_rows'] or end > job['total_rows']
+                or (len(products) % job['chunk_size'] and end != job['total_rows'])):
+            conn.rollback()
+            cur.close()
+            return {
+                'statusCode': 409,
+                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                'body': json.dumps({
+                    'error': 'Часть товаров не совпадает с заданием импорта',
+                    'uploadedRows': job['uploaded_rows'],
+                    'totalRows': job['total_rows'],
+                    'chunkSize': job['chunk_size']
+                }),
+                'isBase64Encoded': False
+            }
+        store_payload(cur, job, offset, products)
+    conn.commit()
+    
+    deadline = time.monotonic() + IMPORT_TIME_BUDGET
+    row_errors: List[Dict[str, Any]] = []
+    chunk_errors: List[Dict[str, Any]] = []
+    chunk_no = job['next_chunk']
+    
+    while chunk_no < job['total_chunks'] and time.monotonic() < deadline:
+        # Блокировка задания не даёт двум параллельным вызовам импортировать один кусок дважды
+        locked = load_job(cur, job['id'], lock=True)
+        if locked['next_chunk'] != chunk_no:
+            conn.rollback()
+            chunk_no = locked['next_chunk']
             continue
         
-        image = product.get('image', '')
-        description = product.get('description', '')
-        in_stock = product.get('inStock', True)
-        rating = product.get('rating', 5.0)
-        reviews = product.get('reviews', 0)
-        has_remote = product.get('hasRemote', False)
-        is_dimmable = product.get('isDimmable', False)
-        has_color_change = product.get('hasColorChange', False)
-        
-        article = product.get('article')
-        brand_country = product.get('brandCountry')
-        manufacturer_country = product.get('manufacturerCountry')
-        collection = product.get('collection')
-        style = product.get('style')
-        lamp_type = product.get('lampType')
-        socket_type = product.get('socketType')
-        bulb_type = product.get('bulbType')
-        lamp_count = product.get('lampCount')
-        lamp_power = product.get('lampPower')
-        total_power = product.get('totalPower')
-        lighting_area = product.get('lightingArea')
-        voltage = product.get('voltage')
-        color = product.get('color')
-        height = product.get('height')
-        diameter = product.get('diameter')
-        length = product.get('length')
-        width = product.get('width')
-        depth = product.get('depth')
-        chain_length = product.get('chainLength')
-        materials = product.get('materials')
-        frame_material = product.get('frameMaterial')
-        shade_material = product.get('shadeMaterial')
-        frame_color = product.get('frameColor')
-        shade_color = product.get('shadeColor')
-        shade_direction = product.get('shadeDirection')
-        diffuser_type = product.get('diffuserType')
-        diffuser_shape = product.get('diffuserShape')
-        ip_rating = product.get('ipRating')
-        interior = product.get('interior')
-        place = product.get('place')
-        suspended_ceiling = product.get('suspendedCeiling', False)
-        mount_type = product.get('mountType')
-        official_warranty = product.get('officialWarranty')
-        shop_warranty = product.get('shopWarranty')
-        section = product.get('section')
-        catalog = product.get('catalog')
-        subcategory = product.get('subcategory')
-        images = product.get('images', [])
+        start = chunk_no * job['chunk_size']
+        chunk = load_payload(cur, job['id'], chunk_no)
+        if chunk is None:
+            if locked['uploaded_rows'] <= start:
+                # Кусок ещё не загружен: ждём следующую часть
+                conn.rollback()
+                break
+            # Загружен, но не сохранён (задание создано до хранения товаров в базе)
+            chunk_errors.append({'chunk': chunk_no, 'error': 'Товары куска не сохранены'})
+            record_chunk(cur, job, chunk_no, None, 0, [], 'Товары куска не сохранены')
+            conn.commit()
+            chunk_no += 1
+            continue
         
-        # Формируем одну строку VALUES
-        value_row = f"""(
-            {escape_sql(name)}, {escape_sql(description)}, {price}, {escape_sql(brand)}, {escape_sql(product_type)},
-            {escape_sql(image)}, {escape_sql(in_stock)}, {rating}, {reviews}, {escape_sql(has_remote)},
-            {escape_sql(is_dimmable)}, {escape_sql(has_color_change)}, {escape_sql(article)}, {escape_sql(brand_country)},
-            {escape_sql(manufacturer_country)}, {escape_sql(collection)}, {escape_sql(style)}, {escape_sql(lamp_type)},
-            {escape_sql(socket_type)}, {escape_sql(bulb_type)}, {escape_sql(lamp_count)}, {escape_sql(lamp_power)},
-            {escape_sql(total_power)}, {escape_sql(lighting_area)}, {escape_sql(voltage)}, {escape_sql(color)},
-            {escape_sql(height)}, {escape_sql(diameter)}, {escape_sql(length)}, {escape_sql(width)}, {escape_sql(depth)},
-            {escape_sql(chain_length)}, {escape_sql(materials)}, {escape_sql(frame_material)}, {escape_sql(shade_material)},
-            {escape_sql(frame_color)}, {escape_sql(shade_color)}, {escape_sql(shade_direction)}, {escape_sql(diffuser_type)},
-            {escape_sql(diffuser_shape)}, {escape_sql(ip_rating)}, {escape_sql(interior)}, {escape_sql(place)},
-            {escape_sql(suspended_ceiling)}, {escape_sql(mount_type)}, {escape_sql(official_warranty)}, {escape_sql(shop_warranty)},
-            {escape_sql(section)}, {escape_sql(catalog)}, {escape_sql(subcategory)}, {escape_sql(images)}
-        )"""
-        values_parts.append(value_row)
-    
-    if not values_parts:
+        rows, chunk_row_errors = validate_products(chunk, offset=start)
+        row_errors.extend(chunk_row_errors)
+        try:
+            merged = {'inserted': 0, 'updated': 0}
+            if rows:
+                copy_to_staging(cur, rows)
+                merged = merge_staging(cur, job['mode'])
+            record_chunk(cur, job, chunk_no, merged, len(rows), chunk_row_errors)
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            chunk_errors.append({'chunk': chunk_no, 'error': str(e)})
+            load_job(cur, job['id'], lock=True)
+            record_chunk(cur, job, chunk_no, None, len(rows), chunk_row_errors, str(e))
+            conn.commit()
+        chunk_no += 1
+    
+    job = load_job(cur, job['id'])
+    conn.commit()
+    cur.close()
+    
+    completed = job['status'] == 'completed'
+    if completed:
+        message = 'Импорт завершён'
+    elif job['next_chunk'] * job['chunk_size'] >= job['uploaded_rows']:
+        message = 'Загрузите остальные товары: запрос с jobId, offset=uploadedRows и следующей частью'
+    else:
+        message = 'Импорт не завершён: повторите запрос с jobId'
+    return {
+        'statusCode': 200 if completed else 202,
+        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+        'body': json.dumps({
+            'message': message,
+            'jobId': job['id'],
+            'status': job['status'],
+            'totalRows': job['total_rows'],
+            'uploadedRows': job['uploaded_rows'],
+            'chunkSize': job['chunk_size'],
+            'nextChunk': job['next_chunk'],
+            'totalChunks': job['total_chunks'],
+            'success': job['inserted'] + job['updated'],
+            'inserted': job['inserted'],
+            'updated': job['updated'],
+            'unchanged': job['unchanged'],
+            'errors': job['failed_rows'],
+            'failedChunks': job['failed_chunks'],
+            'details': [f"Пропущено: {e['name'] or 'Без названия'} - {e['error']}" for e in row_errors[:10]],
+            'rowErrors': row_errors[:IMPORT_MAX_ROW_ERRORS],
+            'chunkErrors': chunk_errors
+        }),
+        'isBase64Encoded': False
+    }
+
+def handle_import_status(params: Dict[str, Any], cur) -> Dict[str, Any]:
+    '''Progress of a bulk import job with its failed chunks and invalid rows: ?action=import_status&job=N'''
+    job = load_job(cur, int(params.get('job') or 0))
+    if not job:
+        cur.close()
+        return {
+            'statusCode': 404,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': 'Задание импорта не найдено'}, ensure_ascii=False),
+            'isBase64Encoded': False
+        }
+    chunks = load_job_chunks(cur, job['id'])
+    cur.close()
+    return {
+        'statusCode': 200,
+        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*', 'Cache-Control': 'no-store'},
+        'body': json.dumps({
+            'jobId': job['id'],
+            'status': job['status'],
+            'mode': job['mode'],
+            'totalRows': job['total_rows'],
+            'uploadedRows': job['uploaded_rows'],
+            'chunkSize': job['chunk_size'],
+            'nextChunk': job['next_chunk'],
+            'totalChunks': job['total_chunks'],
+            'inserted': job['inserted'],
+            'updated': job['updated'],
+            'unchanged': job['unchanged'],
+            'failedRows': job['failed_rows'],
+            'failedChunks': job['failed_chunks'],
+            'chunks': chunks
+        }),
+        'isBase64Encoded': False
+    }
+
+PATCH_MAX_ROWS = int(os.environ.get('PRODUCTS_PATCH_MAX_ROWS', '50000'))
+
+def handle_bulk_patch(event: Dict[str, Any], cur, conn) -> Dict[str, Any]:
+    '''
+    Массовое обновление цен, наличия и флагов: тело — список [{id|article, price, inStock, isSale, ...}]
+    или {"items": [...]}. Все строки применяются одним UPDATE ... FROM из временной таблицы,
+    для каждой строки возвращается результат: updated, unchanged, not_found, duplicate или invalid
+    '''
+    body = json.loads(event.get('body') or '[]')
+    items = body.get('items') if isinstance(body, dict) else body
+    if not isinstance(items, list) or not items:
         cur.close()
-        conn.close()
         return {
             'statusCode': 400,
             'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({
-                'message': 'Нет валидных товаров для импорта',
-                'success': 0,
-                'errors': error_count,
-                'details': errors[:10]
-            }),
+            'body': json.dumps({'error': 'Ожидается непустой список изменений'}),
             'isBase64Encoded': False
         }
-    
-    # Единый INSERT со всеми значениями
-    query = f"""
-    INSERT INTO t_p94134469_chandelier_sale_site.products (
-        name, description, price, brand, type, image_url, in_stock, rating, reviews,
-        has_remote, is_dimmable, has_color_change, article, brand_country, manufacturer_country,
-        collection, style, lamp_type, socket_type, bulb_type, lamp_count, lamp_power, total_power,
-        lighting_area, voltage, color, height, diameter, length, width, depth, chain_length,
-        materials, frame_material, shade_material, frame_color, shade_color, shade_direction,
-        diffuser_type, diffuser_shape, ip_rating, interior, place, suspended_ceiling, mount_type,
-        official_warranty, shop_warranty, section, catalog, subcategory, images
-    ) VALUES
-    {', '.join(values_parts)}
-    """
-    
-    try:
-        cur.execute(query)
-        success_count = len(values_parts)
-        conn.commit()
-    except Exception as e:
-        conn.rollback()
+    if len(items) > PATCH_MAX_ROWS:
         cur.close()
-        conn.close()
         return {
-            'statusCode': 500,
+            'statusCode': 413,
             'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({
-                'error': f'Ошибка массового импорта: {str(e)}',
-                'success': 0,
-                'errors': error_count + len(values_parts)
-            }),
+            'body': json.dumps({'error': f'Не больше {PATCH_MAX_ROWS} строк за запрос'}),
             'isBase64Encoded': False
         }
     
+    rows, invalid = validate_patches(items)
+    results = apply_patches(cur, rows) if rows else []
+    counts = {status: 0 for status in ('updated', 'unchanged', 'not_found', 'duplicate')}
+    for result in results:
+        counts[result['status']] += 1
+    conn.commit()
     cur.close()
-    conn.close()
     
+    results = sorted(results + invalid, key=lambda result: result['row'])
     return {
         'statusCode': 200,
         'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-        'body': json.dumps({
-            'message': f'Импорт завершён',
-            'success': success_count,
-            'errors': error_count,
-            'details': errors[:10] if errors else []
+        'body': dumps({
+            'updated': counts['updated'],
+            'unchanged': counts['unchanged'],
+            'notFound': counts['not_found'],
+            'duplicate': counts['duplicate'],
+            'invalid': len(invalid),
+            'results': results
         }),
         'isBase64Encoded': False
-    }
\ No newline at end of file
+    }
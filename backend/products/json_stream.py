@@ -0,0 +1,54 @@
+'''
+Incremental JSON encoding of query results.
+
+Rows are fetched from the cursor and encoded batch_size at a time straight
+into the response buffer, so besides the body itself only one batch of rows
+and their dicts is held in memory. With a server-side (named) cursor the
+rows are not transferred from Postgres until they are fetched either.
+
+Usage:
+    out = io.StringIO()
+    out.write('{"items":')
+    cur = conn.cursor(name='items_stream')
+    cur.execute(query)
+    write_array(out, cur, lambda rows: json.dumps([dict_for(row) for row in rows]))
+    out.write('}')
+'''
+import os
+from typing import Any, Callable, List, Optional, Sequence, TextIO, Tuple
+
+BATCH_SIZE = int(os.environ.get('JSON_STREAM_BATCH_SIZE', '200'))
+
+
+def write_array(
+    out: TextIO,
+    cur,
+    encode_batch: Callable[[List[Sequence[Any]]], str],
+    limit: Optional[int] = None,
+    batch_size: int = BATCH_SIZE
+) -> Tuple[int, Optional[Sequence[Any]], bool]:
+    '''
+    Write the rows of an executed cursor to `out` as a JSON array.
+    encode_batch turns a list of rows into a JSON array string.
+    Stops after `limit` rows; returns the number of rows written,
+    the last written row and whether the cursor had more rows.
+    '''
+    out.write('[')
+    written = 0
+    last_row = None
+    has_more = False
+    while True:
+        size = batch_size if limit is None else min(batch_size, limit - written)
+        if size <= 0:
+            has_more = cur.fetchone() is not None
+            break
+        batch = cur.fetchmany(size)
+        if not batch:
+            break
+        if written:
+            out.write(',')
+        out.write(encode_batch(batch)[1:-1])
+        written += len(batch)
+        last_row = batch[-1]
+    out.write(']')
+    return written, last_row, has_more
@@ -0,0 +1,274 @@
+'''
+Parameterized SQL for the catalog filters.
+
+Values are always bound as named parameters and lists are bound as arrays,
+so a given combination of filters produces the same SQL text whatever the
+values are. On pooled connections such statements are prepared once on the
+server and later invocations only send EXECUTE with the new values.
+'''
+import hashlib
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+# (group, SQL with %(name)s placeholders, parameter values)
+Filter = Tuple[str, str, Dict[str, Any]]
+
+SEARCH_MODES = ('substring', 'fuzzy', 'fts')
+
+# A single token with a digit, such as an article "MOD-4012-05", is matched as a substring:
+# the Russian text search configuration splits and stems such tokens unpredictably
+ARTICLE_LIKE = re.compile(r'^[\w./-]*\d[\w./-]*$')
+
+# Words of a full-text query; everything else, including tsquery operators, is dropped
+SEARCH_WORD = re.compile(r'[^\W_]+')
+
+FLAG_PARAMS = ('has_remote', 'is_dimmable', 'has_color_change', 'is_sale', 'is_new', 'pickup_available')
+
+# Integer columns filterable with ?min_<column>= and ?max_<column>= (millimetres, watts, square metres)
+RANGE_PARAMS = ('height', 'diameter', 'length', 'width', 'lamp_count', 'lamp_power', 'total_power', 'lighting_area')
+
+# Spec attributes filterable with ?attr[key]=v1,v2; the products.attributes jsonb column (V0043)
+# holds each of them as an array of values and is indexed with GIN
+ATTRIBUTE_KEYS = (
+    'materials', 'frame_material', 'shade_material', 'frame_color', 'shade_color',
+    'lamp_type', 'socket_type', 'bulb_type', 'shade_direction', 'diffuser_type', 'diffuser_shape',
+    'ip_rating', 'interior', 'place', 'mount_type', 'collection', 'brand_country', 'manufacturer_country'
+)
+
+ATTRIBUTE_PARAM = re.compile(r'^attr\[(\w+)\]$')
+
+# Sort keys and direction per ?sort= value. Nullable columns are sorted through COALESCE so
+# keyset cursors never compare NULLs; V0041 indexes exactly these expressions.
+SORT_ORDERS: Dict[str, Tuple[List[str], bool]] = {
+    'price_asc': (['price', 'id'], False),
+    'price_desc': (['price', 'id'], True),
+    'rating': (['COALESCE(rating, 0)', 'COALESCE(reviews, 0)', 'id'], True),
+    'newest': (["COALESCE(created_at, 'epoch')", 'id'], True),
+    'popular': (['COALESCE(reviews, 0)', 'COALESCE(rating, 0)', 'id'], True),
+}
+
+# Columns of the narrow product_cards read table (V0042), kept in sync with products by triggers
+CARD_TABLE_COLUMNS = frozenset({
+    'id', 'name', 'price', 'brand', 'type', 'image_url', 'in_stock', 'rating', 'reviews',
+    'has_remote', 'is_dimmable', 'has_color_change', 'article', 'category', 'style', 'color',
+    'is_sale', 'is_new', 'pickup_available', 'created_at', 'brand_country', 'manufacturer_country',
+    'lamp_type', 'materials', 'lamp_count', 'lamp_power', 'total_power', 'lighting_area',
+    'height', 'diameter', 'length', 'width', 'description_excerpt'
+})
+
+# Filter groups that only reference product_cards columns; search needs the trigram and
+# full-text indexes of products
+CARD_TABLE_GROUPS = frozenset({
+    'id', 'brand', 'category', 'type', 'price', 'style', 'color', 'in_stock', *FLAG_PARAMS, *RANGE_PARAMS
+})
+
+# Prepared statements kept per connection before they are all deallocated
+MAX_PREPARED = 200
+
+PLACEHOLDER = re.compile(r'%\((\w+)\)s|%%')
+
+
+def split_list(value: Optional[str]) -> List[str]:
+    return [v for v in value.split(',') if v] if value else []
+
+
+def parse_int(name: str, value: str) -> int:
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f'{name} must be an integer')
+
+
+def search_mode(params: Dict[str, Any]) -> str:
+    '''
+    Search mode for the request: ?search_mode= if given, otherwise ranked full-text search,
+    or substring match for article-like input and input without words
+    '''
+    mode = params.get('search_mode')
+    if mode:
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"search_mode must be one of: {', '.join(SEARCH_MODES)}")
+        return mode
+    search = params.get('search', '').strip()
+    return 'substring' if ARTICLE_LIKE.match(search) or not SEARCH_WORD.search(search) else 'fts'
+
+
+def prefix_tsquery(search: str) -> str:
+    '''
+    to_tsquery text matching every word of the input as a prefix, so "люст" finds "Люстра"
+    while it is still being typed: "подвесная люст" -> "подвесная:* & люст:*"
+    '''
+    return ' & '.join(f'{word}:*' for word in SEARCH_WORD.findall(search))
+
+
+def build_filters(params: Dict[str, Any]) -> List[Filter]:
+    '''
+    Translate catalog query parameters into WHERE clauses.
+    Each clause carries a group name so callers can drop a group, e.g. for facet counts.
+    '''
+    filters: List[Filter] = []
+
+    if params.get('id'):
+        filters.append(('id', 'id = %(id)s', {'id': int(params['id'])}))
+
+    search = params.get('search', '')
+    mode = search_mode(params)
+    if search and mode == 'fts':
+        # Weighted prefix match over name, article, type, brand, collection and description (V0050)
+        filters.append(('search', "search_vector @@ to_tsquery('russian', %(search_query)s)", {'search_query': prefix_tsquery(search)}))
+    elif search and mode == 'fuzzy':
+        # Typo-tolerant word match, served by the gin_trgm_ops indexes
+        filters.append(('search', '(%(search)s <%% name OR %(search)s <%% brand)', {'search': search}))
+    elif search:
+        # Substring match; the trigram indexes on name, brand, type and article serve ILIKE '%x%'
+        filters.append((
+            'search',
+            '(name ILIKE %(search_pattern)s OR brand ILIKE %(search_pattern)s OR type ILIKE %(search_pattern)s'
+            ' OR article ILIKE %(search_pattern)s)',
+            {'search_pattern': f'%{search}%'}
+        ))
+
+    brands = split_list(params.get('brands'))
+    if brands:
+        filters.append(('brand', 'brand = ANY(%(brands)s)', {'brands': brands}))
+
+    if params.get('category'):
+        filters.append(('category', 'category = %(category)s', {'category': params['category']}))
+
+    if params.get('type'):
+        filters.append(('type', 'type = %(type)s', {'type': params['type']}))
+
+    if params.get('min_price'):
+        filters.append(('price', 'price >= %(min_price)s', {'min_price': float(params['min_price'])}))
+
+    if params.get('max_price'):
+        filters.append(('price', 'price <= %(max_price)s', {'max_price': float(params['max_price'])}))
+
+    for column in RANGE_PARAMS:
+        for bound, operator in (('min', '>='), ('max', '<=')):
+            param_name = f'{bound}_{column}'
+            if params.get(param_name):
+                filters.append((column, f'{column} {operator} %({param_name})s', {param_name: parse_int(param_name, params[param_name])}))
+
+    for param_name in FLAG_PARAMS:
+        value = params.get(param_name)
+        if value and value.lower() == 'true':
+            filters.append((param_name, f'{param_name} = TRUE', {}))
+
+    styles = split_list(params.get('styles'))
+    if styles:
+        filters.append(('style', 'style = ANY(%(styles)s)', {'styles': styles}))
+
+    colors = split_list(params.get('colors'))
+    if colors:
+        filters.append(('color', 'color = ANY(%(colors)s)', {'colors': colors}))
+
+    # One containment test per value, ORed within a key and ANDed across keys. Each test is a
+    # GIN index lookup; keys are visited in sorted order so the SQL text is stable.
+    for name in sorted(params):
+        match = ATTRIBUTE_PARAM.match(name)
+        if not match:
+            continue
+        key = match.group(1)
+        if key not in ATTRIBUTE_KEYS:
+            raise ValueError(f"Unknown attribute: {key}")
+        attr_values = split_list(params[name])
+        if not attr_values:
+            continue
+        names = [f'attr_{key}_{i}' for i in range(len(attr_values))]
+        filters.append((
+            f'attr_{key}',
+            '(' + ' OR '.join(f'attributes @> %({n})s' for n in names) + ')',
+            {n: json.dumps({key: [value]}, ensure_ascii=False) for n, value in zip(names, attr_values)}
+        ))
+
+    filters.append(('in_stock', 'in_stock = TRUE', {}))
+
+    return filters
+
+
+def where_sql(filters: List[Filter], exclude: Optional[str] = None) -> Tuple[str, Dict[str, Any]]:
+    '''Join filter clauses into a WHERE body and its parameters, optionally skipping one group'''
+    clauses = []
+    values: Dict[str, Any] = {}
+    for group, clause, clause_values in filters:
+        if group == exclude:
+            continue
+        clauses.append(clause)
+        values.update(clause_values)
+    return (' AND '.join(clauses) if clauses else 'TRUE'), values
+
+
+def listing_table(filters: List[Filter], columns: List[str]) -> str:
+    '''
+    Table to read a listing from: product_cards when the projection and every filter fit
+    into it, otherwise the full products table. Sort keys from SORT_ORDERS always fit.
+    '''
+    if all(group in CARD_TABLE_GROUPS for group, _, _ in filters) and all(c in CARD_TABLE_COLUMNS for c in columns):
+        return 'product_cards'
+    return 'products'
+
+
+def build_order(params: Dict[str, Any]) -> Tuple[List[str], bool, Dict[str, Any]]:
+    '''
+    Sort key expressions for the listing, ending with id as a unique tie-breaker,
+    whether they are descending, and the parameters they reference.
+    Cursors carry the values of these keys. An explicit ?sort= takes precedence over search relevance.
+    '''
+    sort = params.get('sort')
+    if sort:
+        if sort not in SORT_ORDERS:
+            raise ValueError(f"sort must be one of: {', '.join(SORT_ORDERS)}")
+        keys, descending = SORT_ORDERS[sort]
+        return list(keys), descending, {}
+    search = params.get('search', '')
+    mode = search_mode(params)
+    # Relevance scores are real; as float8 they survive the JSON round trip through the cursor exactly,
+    # so rows with equal scores are split by id instead of being skipped or repeated across pages.
+    if search and mode == 'fuzzy':
+        return ['GREATEST(word_similarity(%(search)s, name), word_similarity(%(search)s, brand))::float8', 'id'], True, {'search': search}
+    if search and mode == 'fts':
+        return ["ts_rank(search_vector, to_tsquery('russian', %(search_query)s))::float8", 'id'], True, {'search_query': prefix_tsquery(search)}
+    return ['id'], False, {}
+
+
+def to_positional(sql: str) -> Tuple[str, List[str]]:
+    '''Rewrite %(name)s placeholders as $1, $2 ... for PREPARE; returns the names in order'''
+    names: List[str] = []
+
+    def replace(match: 're.Match[str]') -> str:
+        name = match.group(1)
+        if name is None:
+            return '%'
+        if name not in names:
+            names.append(name)
+        return f'${names.index(name) + 1}'
+
+    return PLACEHOLDER.sub(replace, sql), names
+
+
+def execute(cur, sql: str, values: Dict[str, Any]) -> None:
+    '''
+    Run a parameterized statement. On pooled connections the statement is
+    prepared on the server the first time its text is seen, so repeated
+    filter shapes skip parsing and planning.
+    '''
+    prepared = getattr(cur.connection, 'prepared', None)
+    if prepared is None:
+        cur.execute(sql, values)
+        return
+
+    name = 'catalog_' + hashlib.md5(sql.encode('utf-8')).hexdigest()[:16]
+    positional_sql, names = to_positional(sql)
+    if name not in prepared:
+        if len(prepared) >= MAX_PREPARED:
+            cur.execute('DEALLOCATE ALL')
+            prepared.clear()
+        cur.execute(f'PREPARE {name} AS {positional_sql}')
+        prepared.add(name)
+
+    if names:
+        cur.execute(f"EXECUTE {name} ({', '.join(f'%({n})s' for n in names)})", values)
+    else:
+        cur.execute(f'EXECUTE {name}')
@@ -0,0 +1,157 @@
+'''
+Product row serialization for catalog responses.
+
+row_mapper compiles, once per projection and cursor description, a function
+that builds the response dict with positional row access in a single dict
+literal, instead of looping over fields per row. dumps uses orjson when it is
+installed and falls back to the standard json module.
+'''
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Response key, table column and optional converter
+Field = Tuple[str, str, Optional[Callable[[Any], Any]]]
+
+
+def to_price(value: Any) -> float:
+    return float(value) if value is not None else 0.0
+
+
+def to_rating(value: Any) -> float:
+    return float(value) if value is not None else 5.0
+
+
+def to_count(value: Any) -> int:
+    return int(value) if value is not None else 0
+
+
+def to_images(value: Any) -> list:
+    if isinstance(value, list):
+        return value
+    return json.loads(value) if value else []
+
+
+# Every serialized product field, in response order
+PRODUCT_FIELDS: List[Field] = [
+    ('id', 'id', None),
+    ('name', 'name', None),
+    ('description', 'description', None),
+    ('price', 'price', to_price),
+    ('brand', 'brand', None),
+    ('type', 'type', None),
+    ('image', 'image_url', None),
+    ('inStock', 'in_stock', None),
+    ('rating', 'rating', to_rating),
+    ('reviews', 'reviews', to_count),
+    ('hasRemote', 'has_remote', bool),
+    ('isDimmable', 'is_dimmable', bool),
+    ('hasColorChange', 'has_color_change', bool),
+    ('article', 'article', None),
+    ('brandCountry', 'brand_country', None),
+    ('manufacturerCountry', 'manufacturer_country', None),
+    ('collection', 'collection', None),
+    ('style', 'style', None),
+    ('lampType', 'lamp_type', None),
+    ('socketType', 'socket_type', None),
+    ('bulbType', 'bulb_type', None),
+    ('lampCount', 'lamp_count', None),
+    ('lampPower', 'lamp_power', None),
+    ('totalPower', 'total_power', None),
+    ('lightingArea', 'lighting_area', None),
+    ('voltage', 'voltage', None),
+    ('color', 'color', None),
+    ('height', 'height', None),
+    ('diameter', 'diameter', None),
+    ('length', 'length', None),
+    ('width', 'width', None),
+    ('depth', 'depth', None),
+    ('chainLength', 'chain_length', None),
+    ('materials', 'materials', None),
+    ('frameMaterial', 'frame_material', None),
+    ('shadeMaterial', 'shade_material', None),
+    ('frameColor', 'frame_color', None),
+    ('shadeColor', 'shade_color', None),
+    ('shadeDirection', 'shade_direction', None),
+    ('diffuserType', 'diffuser_type', None),
+    ('diffuserShape', 'diffuser_shape', None),
+    ('ipRating', 'ip_rating', None),
+    ('interior', 'interior', None),
+    ('place', 'place', None),
+    ('suspendedCeiling', 'suspended_ceiling', None),
+    ('mountType', 'mount_type', None),
+    ('officialWarranty', 'official_warranty', None),
+    ('shopWarranty', 'shop_warranty', None),
+    ('section', 'section', None),
+    ('catalog', 'catalog', None),
+    ('subcategory', 'subcategory', None),
+    ('category', 'category', None),
+    ('images', 'images', to_images),
+]
+
+# Fields rendered by catalog grid cards; all of them are stored in product_cards
+CARD_FIELDS = {
+    'id', 'name', 'description', 'price', 'brand', 'type', 'image', 'inStock', 'rating', 'reviews',
+    'hasRemote', 'isDimmable', 'hasColorChange', 'article', 'category',
+    'brandCountry', 'manufacturerCountry', 'lampType', 'lampCount', 'totalPower',
+    'materials', 'color', 'height', 'diameter', 'length', 'width'
+}
+
+# Card projection: the grid shows two lines of description, so cards carry only its first
+# 200 characters (the description_excerpt column) instead of the full text
+CARD_VIEW: List[Field] = [
+    ('description', 'description_excerpt', None) if field[0] == 'description' else field
+    for field in PRODUCT_FIELDS if field[0] in CARD_FIELDS
+]
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+def dumps(value: Any) -> str:
+    '''Serialize a response body'''
+    if orjson is not None:
+        return orjson.dumps(value, default=_default).decode('utf-8')
+    return json.dumps(value, default=_default)
+
+
+# Compiled mappers kept per process. Sparse fieldsets (?fields=) make the set of projections
+# unbounded, so the least recently used mappers are evicted.
+MAPPER_CACHE_SIZE = 128
+
+
+def row_mapper(fields: List[Field], description: Sequence[Any]) -> Callable[[Sequence[Any]], Dict[str, Any]]:
+    '''
+    Return a function turning a row with the given cursor description into the
+    API representation of `fields`. Columns are looked up by name once, when the
+    mapper is compiled; compiled mappers are cached for later invocations.
+    '''
+    return _compile_mapper(tuple(fields), tuple(column[0] for column in description))
+
+
+@lru_cache(maxsize=MAPPER_CACHE_SIZE)
+def _compile_mapper(fields: Tuple[Field, ...], columns: Tuple[str, ...]) -> Callable[[Sequence[Any]], Dict[str, Any]]:
+    namespace: Dict[str, Any] = {}
+    items = []
+    for i, (key, column, convert) in enumerate(fields):
+        position = columns.index(column)
+        if convert is None:
+            items.append(f'{key!r}: row[{position}]')
+        else:
+            namespace[f'convert_{i}'] = convert
+            items.append(f'{key!r}: convert_{i}(row[{position}])')
+    source = 'def map_row(row):\n    return {' + ', '.join(items) + '}\n'
+    exec(compile(source, f'<row_mapper {len(fields)} fields>', 'exec'), namespace)
+    return namespace['map_row']
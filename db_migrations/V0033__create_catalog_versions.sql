@@ -0,0 +1,11 @@
+-- Версии каталогов: счётчик увеличивается при каждом изменении товаров
+-- и используется для инвалидации кэша ответов GET в функции products
+CREATE TABLE IF NOT EXISTS t_p94134469_chandelier_sale_site.catalog_versions (
+    catalog VARCHAR(50) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 1,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO t_p94134469_chandelier_sale_site.catalog_versions (catalog, version)
+VALUES ('products', 1)
+ON CONFLICT (catalog) DO NOTHING;
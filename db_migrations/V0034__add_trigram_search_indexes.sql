@@ -0,0 +1,6 @@
+-- Триграммные индексы для поиска по подстроке (ILIKE '%x%') и нечёткого поиска с опечатками
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS idx_products_name_trgm ON t_p94134469_chandelier_sale_site.products USING gin (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_products_brand_trgm ON t_p94134469_chandelier_sale_site.products USING gin (brand gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_products_type_trgm ON t_p94134469_chandelier_sale_site.products USING gin (type gin_trgm_ops);
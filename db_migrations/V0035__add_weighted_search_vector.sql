@@ -0,0 +1,16 @@
+-- Взвешенный полнотекстовый индекс по товарам: название и артикул (A), бренд и коллекция (B), описание (D)
+-- Хранимая генерируемая колонка пересчитывается автоматически при INSERT и UPDATE
+ALTER TABLE t_p94134469_chandelier_sale_site.products
+ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('russian', coalesce(name, '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce(article, '')), 'A') ||
+    setweight(to_tsvector('russian', coalesce(brand, '')), 'B') ||
+    setweight(to_tsvector('russian', coalesce(collection, '')), 'B') ||
+    setweight(to_tsvector('russian', coalesce(description, '')), 'D')
+) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_products_search_vector ON t_p94134469_chandelier_sale_site.products USING gin (search_vector);
+
+-- Индексы по выражениям из V0019 больше не используются запросами
+DROP INDEX IF EXISTS t_p94134469_chandelier_sale_site.idx_products_name_search;
+DROP INDEX IF EXISTS t_p94134469_chandelier_sale_site.idx_products_brand_search;
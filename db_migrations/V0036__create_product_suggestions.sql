@@ -0,0 +1,107 @@
+-- Префиксный индекс подсказок для поиска (автодополнение):
+-- уникальные названия, бренды, коллекции и артикулы с числом товаров
+CREATE TABLE IF NOT EXISTS t_p94134469_chandelier_sale_site.product_suggestions (
+    kind VARCHAR(20) NOT NULL,
+    term VARCHAR(255) NOT NULL,
+    term_norm VARCHAR(255) NOT NULL,
+    weight INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (kind, term)
+);
+
+-- text_pattern_ops позволяет искать по LIKE 'префикс%' независимо от правил сортировки базы
+CREATE INDEX IF NOT EXISTS idx_product_suggestions_prefix
+ON t_p94134469_chandelier_sale_site.product_suggestions (term_norm text_pattern_ops);
+
+-- Синхронизация с products через statement-триггеры с таблицами переходов:
+-- массовый импорт обновляет подсказки несколькими запросами, а не построчно.
+-- Таблицы переходов видны только в своих ветках, поэтому каждая операция описана отдельно
+CREATE OR REPLACE FUNCTION t_p94134469_chandelier_sale_site.sync_product_suggestions()
+RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO t_p94134469_chandelier_sale_site.product_suggestions (kind, term, term_norm, weight)
+        SELECT v.kind, v.term, lower(v.term), COUNT(*)
+        FROM new_rows n
+        CROSS JOIN LATERAL (VALUES ('name', n.name), ('brand', n.brand), ('collection', n.collection), ('article', n.article)) AS v(kind, term)
+        WHERE v.term IS NOT NULL AND v.term <> ''
+        GROUP BY v.kind, v.term
+        ON CONFLICT (kind, term) DO UPDATE SET weight = product_suggestions.weight + EXCLUDED.weight;
+
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE t_p94134469_chandelier_sale_site.product_suggestions s
+        SET weight = s.weight - removed.cnt
+        FROM (
+            SELECT v.kind, v.term, COUNT(*) AS cnt
+            FROM old_rows r
+            CROSS JOIN LATERAL (VALUES ('name', r.name), ('brand', r.brand), ('collection', r.collection), ('article', r.article)) AS v(kind, term)
+            WHERE v.term IS NOT NULL AND v.term <> ''
+            GROUP BY v.kind, v.term
+        ) removed
+        WHERE s.kind = removed.kind AND s.term = removed.term;
+
+        DELETE FROM t_p94134469_chandelier_sale_site.product_suggestions s
+        USING old_rows r
+        CROSS JOIN LATERAL (VALUES ('name', r.name), ('brand', r.brand), ('collection', r.collection), ('article', r.article)) AS v(kind, term)
+        WHERE s.kind = v.kind AND s.term = v.term AND s.weight <= 0;
+
+    ELSE
+        -- UPDATE: учитываются только строки, у которых изменились название, бренд, коллекция или артикул
+        UPDATE t_p94134469_chandelier_sale_site.product_suggestions s
+        SET weight = s.weight - removed.cnt
+        FROM (
+            SELECT v.kind, v.term, COUNT(*) AS cnt
+            FROM old_rows r
+            JOIN new_rows n ON n.id = r.id
+            CROSS JOIN LATERAL (VALUES ('name', r.name), ('brand', r.brand), ('collection', r.collection), ('article', r.article)) AS v(kind, term)
+            WHERE (r.name, r.brand, r.collection, r.article) IS DISTINCT FROM (n.name, n.brand, n.collection, n.article)
+              AND v.term IS NOT NULL AND v.term <> ''
+            GROUP BY v.kind, v.term
+        ) removed
+        WHERE s.kind = removed.kind AND s.term = removed.term;
+
+        DELETE FROM t_p94134469_chandelier_sale_site.product_suggestions s
+        USING old_rows r
+        CROSS JOIN LATERAL (VALUES ('name', r.name), ('brand', r.brand), ('collection', r.collection), ('article', r.article)) AS v(kind, term)
+        WHERE s.kind = v.kind AND s.term = v.term AND s.weight <= 0;
+
+        INSERT INTO t_p94134469_chandelier_sale_site.product_suggestions (kind, term, term_norm, weight)
+        SELECT v.kind, v.term, lower(v.term), COUNT(*)
+        FROM new_rows n
+        JOIN old_rows r ON r.id = n.id
+        CROSS JOIN LATERAL (VALUES ('name', n.name), ('brand', n.brand), ('collection', n.collection), ('article', n.article)) AS v(kind, term)
+        WHERE (r.name, r.brand, r.collection, r.article) IS DISTINCT FROM (n.name, n.brand, n.collection, n.article)
+          AND v.term IS NOT NULL AND v.term <> ''
+        GROUP BY v.kind, v.term
+        ON CONFLICT (kind, term) DO UPDATE SET weight = product_suggestions.weight + EXCLUDED.weight;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_product_suggestions_insert ON t_p94134469_chandelier_sale_site.products;
+CREATE TRIGGER trg_product_suggestions_insert
+AFTER INSERT ON t_p94134469_chandelier_sale_site.products
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION t_p94134469_chandelier_sale_site.sync_product_suggestions();
+
+DROP TRIGGER IF EXISTS trg_product_suggestions_update ON t_p94134469_chandelier_sale_site.products;
+CREATE TRIGGER trg_product_suggestions_update
+AFTER UPDATE ON t_p94134469_chandelier_sale_site.products
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION t_p94134469_chandelier_sale_site.sync_product_suggestions();
+
+DROP TRIGGER IF EXISTS trg_product_suggestions_delete ON t_p94134469_chandelier_sale_site.products;
+CREATE TRIGGER trg_product_suggestions_delete
+AFTER DELETE ON t_p94134469_chandelier_sale_site.products
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION t_p94134469_chandelier_sale_site.sync_product_suggestions();
+
+-- Первичное заполнение из текущего каталога
+INSERT INTO t_p94134469_chandelier_sale_site.product_suggestions (kind, term, term_norm, weight)
+SELECT v.kind, v.term, lower(v.term), COUNT(*)
+FROM t_p94134469_chandelier_sale_site.products p
+CROSS JOIN LATERAL (VALUES ('name', p.name), ('brand', p.brand), ('collection', p.collection), ('article', p.article)) AS v(kind, term)
+WHERE v.term IS NOT NULL AND v.term <> ''
+GROUP BY v.kind, v.term
+ON CONFLICT (kind, term) DO NOTHING;
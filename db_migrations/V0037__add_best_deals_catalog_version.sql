@@ -0,0 +1,5 @@
+-- Версия каталога "выгодных цен": по ней функция best-deals строит ETag
+-- и отвечает 304 на повторные запросы неизменённого списка
+INSERT INTO t_p94134469_chandelier_sale_site.catalog_versions (catalog, version)
+VALUES ('best_deals', 1)
+ON CONFLICT (catalog) DO NOTHING;
@@ -0,0 +1,13 @@
+-- Артикул становится ключом импорта: повторная загрузка обновляет товар, а не создаёт дубликат.
+-- Сначала удаляем накопившиеся дубликаты (как делала функция cleanup-duplicates, оставляя запись с максимальным id),
+-- но только среди непустых артикулов: товары без артикула не считаются дубликатами друг друга
+DELETE FROM t_p94134469_chandelier_sale_site.products p
+USING t_p94134469_chandelier_sale_site.products newer
+WHERE p.article = newer.article
+  AND p.article <> ''
+  AND p.id < newer.id;
+
+-- Частичный уникальный индекс: пустые и NULL артикулы не ограничены
+CREATE UNIQUE INDEX IF NOT EXISTS idx_products_article_unique
+ON t_p94134469_chandelier_sale_site.products (article)
+WHERE article IS NOT NULL AND article <> '';
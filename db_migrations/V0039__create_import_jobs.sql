@@ -0,0 +1,33 @@
+-- Задания массового импорта товаров: импорт идёт кусками, каждый кусок в своей транзакции.
+-- next_chunk — первый ещё не обработанный кусок, с него продолжается прерванный импорт
+CREATE TABLE IF NOT EXISTS t_p94134469_chandelier_sale_site.import_jobs (
+    id SERIAL PRIMARY KEY,
+    status VARCHAR(20) NOT NULL DEFAULT 'running',
+    mode VARCHAR(20) NOT NULL DEFAULT 'upsert',
+    total_rows INTEGER NOT NULL,
+    chunk_size INTEGER NOT NULL,
+    total_chunks INTEGER NOT NULL,
+    next_chunk INTEGER NOT NULL DEFAULT 0,
+    inserted INTEGER NOT NULL DEFAULT 0,
+    updated INTEGER NOT NULL DEFAULT 0,
+    unchanged INTEGER NOT NULL DEFAULT 0,
+    failed_rows INTEGER NOT NULL DEFAULT 0,
+    failed_chunks INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Результат каждого куска: счётчики, ошибки отдельных строк и ошибка всего куска, если он откатился
+CREATE TABLE IF NOT EXISTS t_p94134469_chandelier_sale_site.import_job_chunks (
+    job_id INTEGER NOT NULL REFERENCES t_p94134469_chandelier_sale_site.import_jobs(id),
+    chunk_no INTEGER NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    inserted INTEGER NOT NULL DEFAULT 0,
+    updated INTEGER NOT NULL DEFAULT 0,
+    unchanged INTEGER NOT NULL DEFAULT 0,
+    failed_rows INTEGER NOT NULL DEFAULT 0,
+    row_errors JSONB NOT NULL DEFAULT '[]'::jsonb,
+    error TEXT,
+    finished_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (job_id, chunk_no)
+);
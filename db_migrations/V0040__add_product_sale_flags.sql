@@ -0,0 +1,5 @@
+-- Флаги, по которым фильтрует каталог и которые обновляет массовый PATCH товаров.
+-- IF NOT EXISTS: на рабочей базе колонки могли быть созданы вручную
+ALTER TABLE t_p94134469_chandelier_sale_site.products ADD COLUMN IF NOT EXISTS is_sale BOOLEAN DEFAULT FALSE;
+ALTER TABLE t_p94134469_chandelier_sale_site.products ADD COLUMN IF NOT EXISTS is_new BOOLEAN DEFAULT FALSE;
+ALTER TABLE t_p94134469_chandelier_sale_site.products ADD COLUMN IF NOT EXISTS pickup_available BOOLEAN DEFAULT FALSE;
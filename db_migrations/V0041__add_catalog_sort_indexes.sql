@@ -0,0 +1,32 @@
+-- Индексы под сортировки каталога (?sort=price_asc|price_desc|rating|newest|popular).
+-- Список всегда фильтруется по in_stock, поэтому индексы частичные. Последняя колонка id
+-- совпадает с ключом курсора, так что страница читается по индексу без сортировки всей выборки.
+-- Выражения COALESCE должны совпадать с SORT_ORDERS в backend/products/query_builder.py
+
+-- Цена: один индекс обслуживает и возрастание, и убывание (обратный проход)
+CREATE INDEX IF NOT EXISTS idx_products_instock_price
+    ON t_p94134469_chandelier_sale_site.products (price, id) WHERE in_stock;
+CREATE INDEX IF NOT EXISTS idx_products_instock_category_price
+    ON t_p94134469_chandelier_sale_site.products (category, price, id) WHERE in_stock;
+
+-- Рейтинг
+CREATE INDEX IF NOT EXISTS idx_products_instock_rating
+    ON t_p94134469_chandelier_sale_site.products (COALESCE(rating, 0), COALESCE(reviews, 0), id) WHERE in_stock;
+CREATE INDEX IF NOT EXISTS idx_products_instock_category_rating
+    ON t_p94134469_chandelier_sale_site.products (category, COALESCE(rating, 0), COALESCE(reviews, 0), id) WHERE in_stock;
+
+-- Новинки
+CREATE INDEX IF NOT EXISTS idx_products_instock_newest
+    ON t_p94134469_chandelier_sale_site.products (COALESCE(created_at, 'epoch'::timestamp), id) WHERE in_stock;
+CREATE INDEX IF NOT EXISTS idx_products_instock_category_newest
+    ON t_p94134469_chandelier_sale_site.products (category, COALESCE(created_at, 'epoch'::timestamp), id) WHERE in_stock;
+
+-- Популярность (число отзывов, затем рейтинг)
+CREATE INDEX IF NOT EXISTS idx_products_instock_popular
+    ON t_p94134469_chandelier_sale_site.products (COALESCE(reviews, 0), COALESCE(rating, 0), id) WHERE in_stock;
+CREATE INDEX IF NOT EXISTS idx_products_instock_category_popular
+    ON t_p94134469_chandelier_sale_site.products (category, COALESCE(reviews, 0), COALESCE(rating, 0), id) WHERE in_stock;
+
+-- Сортировка по умолчанию (id) внутри категории
+CREATE INDEX IF NOT EXISTS idx_products_instock_category_id
+    ON t_p94134469_chandelier_sale_site.products (category, id) WHERE in_stock;
@@ -0,0 +1,158 @@
+-- Узкая таблица карточек каталога: только колонки, которые нужны сетке товаров, фильтрам и сортировкам
+-- (короткие характеристики из карточки и числовые размеры/мощности, без описания и галереи).
+-- Листинг читает её вместо широкой products (длинные description, images и десятки характеристик),
+-- поэтому сканирует намного меньше страниц и горячие данные помещаются в shared buffers.
+-- Состав колонок должен совпадать с CARD_TABLE_COLUMNS в backend/products/query_builder.py
+CREATE TABLE IF NOT EXISTS t_p94134469_chandelier_sale_site.product_cards (
+    id INTEGER PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    price DECIMAL(10, 2) NOT NULL,
+    brand VARCHAR(100),
+    type VARCHAR(50),
+    image_url TEXT,
+    in_stock BOOLEAN,
+    rating NUMERIC(2, 1),
+    reviews INTEGER,
+    has_remote BOOLEAN,
+    is_dimmable BOOLEAN,
+    has_color_change BOOLEAN,
+    article VARCHAR(100),
+    category VARCHAR(100),
+    style VARCHAR(100),
+    color VARCHAR(100),
+    is_sale BOOLEAN,
+    is_new BOOLEAN,
+    pickup_available BOOLEAN,
+    created_at TIMESTAMP,
+    brand_country VARCHAR(100),
+    manufacturer_country VARCHAR(100),
+    lamp_type VARCHAR(100),
+    materials VARCHAR(500),
+    lamp_count INTEGER,
+    lamp_power INTEGER,
+    total_power INTEGER,
+    lighting_area INTEGER,
+    height INTEGER,
+    diameter INTEGER,
+    length INTEGER,
+    width INTEGER
+);
+
+-- Синхронизация с products через statement-триггеры с таблицами переходов, как у product_suggestions:
+-- массовый импорт и массовый PATCH обновляют карточки одним запросом на оператор.
+-- Карточка перезаписывается, только если изменились её колонки
+CREATE OR REPLACE FUNCTION t_p94134469_chandelier_sale_site.sync_product_cards()
+RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        DELETE FROM t_p94134469_chandelier_sale_site.product_cards c
+        USING old_rows r
+        WHERE c.id = r.id;
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP = 'UPDATE' THEN
+        -- Строки, у которых сменился id
+        DELETE FROM t_p94134469_chandelier_sale_site.product_cards c
+        USING old_rows r
+        WHERE c.id = r.id AND NOT EXISTS (SELECT 1 FROM new_rows n WHERE n.id = r.id);
+    END IF;
+
+    INSERT INTO t_p94134469_chandelier_sale_site.product_cards (id, name, price, brand, type, image_url, in_stock, rating, reviews, has_remote, is_dimmable, has_color_change, article, category, style, color, is_sale, is_new, pickup_available, created_at, brand_country, manufacturer_country, lamp_type, materials, lamp_count, lamp_power, total_power, lighting_area, height, diameter, length, width)
+    SELECT n.id, n.name, n.price, n.brand, n.type, n.image_url, n.in_stock, n.rating, n.reviews, n.has_remote, n.is_dimmable, n.has_color_change, n.article, n.category, n.style, n.color, n.is_sale, n.is_new, n.pickup_available, n.created_at, n.brand_country, n.manufacturer_country, n.lamp_type, n.materials, n.lamp_count, n.lamp_power, n.total_power, n.lighting_area, n.height, n.diameter, n.length, n.width
+    FROM new_rows n
+    ON CONFLICT (id) DO UPDATE SET
+        name = EXCLUDED.name,
+        price = EXCLUDED.price,
+        brand = EXCLUDED.brand,
+        type = EXCLUDED.type,
+        image_url = EXCLUDED.image_url,
+        in_stock = EXCLUDED.in_stock,
+        rating = EXCLUDED.rating,
+        reviews = EXCLUDED.reviews,
+        has_remote = EXCLUDED.has_remote,
+        is_dimmable = EXCLUDED.is_dimmable,
+        has_color_change = EXCLUDED.has_color_change,
+        article = EXCLUDED.article,
+        category = EXCLUDED.category,
+        style = EXCLUDED.style,
+        color = EXCLUDED.color,
+        is_sale = EXCLUDED.is_sale,
+        is_new = EXCLUDED.is_new,
+        pickup_available = EXCLUDED.pickup_available,
+        created_at = EXCLUDED.created_at,
+        brand_country = EXCLUDED.brand_country,
+        manufacturer_country = EXCLUDED.manufacturer_country,
+        lamp_type = EXCLUDED.lamp_type,
+        materials = EXCLUDED.materials,
+        lamp_count = EXCLUDED.lamp_count,
+        lamp_power = EXCLUDED.lamp_power,
+        total_power = EXCLUDED.total_power,
+        lighting_area = EXCLUDED.lighting_area,
+        height = EXCLUDED.height,
+        diameter = EXCLUDED.diameter,
+        length = EXCLUDED.length,
+        width = EXCLUDED.width
+    WHERE (product_cards.name, product_cards.price, product_cards.brand, product_cards.type, product_cards.image_url, product_cards.in_stock, product_cards.rating, product_cards.reviews, product_cards.has_remote, product_cards.is_dimmable, product_cards.has_color_change, product_cards.article, product_cards.category, product_cards.style, product_cards.color, product_cards.is_sale, product_cards.is_new, product_cards.pickup_available, product_cards.created_at, product_cards.brand_country, product_cards.manufacturer_country, product_cards.lamp_type, product_cards.materials, product_cards.lamp_count, product_cards.lamp_power, product_cards.total_power, product_cards.lighting_area, product_cards.height, product_cards.diameter, product_cards.length, product_cards.width)
+        IS DISTINCT FROM (EXCLUDED.name, EXCLUDED.price, EXCLUDED.brand, EXCLUDED.type, EXCLUDED.image_url, EXCLUDED.in_stock, EXCLUDED.rating, EXCLUDED.reviews, EXCLUDED.has_remote, EXCLUDED.is_dimmable, EXCLUDED.has_color_change, EXCLUDED.article, EXCLUDED.category, EXCLUDED.style, EXCLUDED.color, EXCLUDED.is_sale, EXCLUDED.is_new, EXCLUDED.pickup_available, EXCLUDED.created_at, EXCLUDED.brand_country, EXCLUDED.manufacturer_country, EXCLUDED.lamp_type, EXCLUDED.materials, EXCLUDED.lamp_count, EXCLUDED.lamp_power, EXCLUDED.total_power, EXCLUDED.lighting_area, EXCLUDED.height, EXCLUDED.diameter, EXCLUDED.length, EXCLUDED.width);
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_product_cards_insert ON t_p94134469_chandelier_sale_site.products;
+CREATE TRIGGER trg_product_cards_insert
+AFTER INSERT ON t_p94134469_chandelier_sale_site.products
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION t_p94134469_chandelier_sale_site.sync_product_cards();
+
+DROP TRIGGER IF EXISTS trg_product_cards_update ON t_p94134469_chandelier_sale_site.products;
+CREATE TRIGGER trg_product_cards_update
+AFTER UPDATE ON t_p94134469_chandelier_sale_site.products
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION t_p94134469_chandelier_sale_site.sync_product_cards();
+
+DROP TRIGGER IF EXISTS trg_product_cards_delete ON t_p94134469_chandelier_sale_site.products;
+CREATE TRIGGER trg_product_cards_delete
+AFTER DELETE ON t_p94134469_chandelier_sale_site.products
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION t_p94134469_chandelier_sale_site.sync_product_cards();
+
+-- Первичное заполнение из текущего каталога
+INSERT INTO t_p94134469_chandelier_sale_site.product_cards (id, name, price, brand, type, image_url, in_stock, rating, reviews, has_remote, is_dimmable, has_color_change, article, category, style, color, is_sale, is_new, pickup_available, created_at, brand_country, manufacturer_country, lamp_type, materials, lamp_count, lamp_power, total_power, lighting_area, height, diameter, length, width)
+SELECT id, name, price, brand, type, image_url, in_stock, rating, reviews, has_remote, is_dimmable, has_color_change, article, category, style, color, is_sale, is_new, pickup_available, created_at, brand_country, manufacturer_country, lamp_type, materials, lamp_count, lamp_power, total_power, lighting_area, height, diameter, length, width
+FROM t_p94134469_chandelier_sale_site.products
+ON CONFLICT (id) DO NOTHING;
+
+-- Индексы фильтров и сортировок листинга (те же выражения, что в V0041)
+CREATE INDEX IF NOT EXISTS idx_product_cards_instock_id
+    ON t_p94134469_chandelier_sale_site.product_cards (id) WHERE in_stock;
+CREATE INDEX IF NOT EXISTS idx_product_cards_instock_category_id
+    ON t_p94134469_chandelier_sale_site.product_cards (category, id) WHERE in_stock;
+CREATE INDEX IF NOT EXISTS idx_product_cards_instock_brand_id
+    ON t_p94134469_chandelier_sale_site.product_cards (brand, id) WHERE in_stock;
+CREATE INDEX IF NOT EXISTS idx_product_cards_instock_type_id
+    ON t_p94134469_chandelier_sale_site.product_cards (type, id) WHERE in_stock;
+CREATE INDEX IF NOT EXISTS idx_product_cards_style
+    ON t_p94134469_chandelier_sale_site.product_cards (style) WHERE style IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_product_cards_color
+    ON t_p94134469_chandelier_sale_site.product_cards (color) WHERE color IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_product_cards_instock_price
+    ON t_p94134469_chandelier_sale_site.product_cards (price, id) WHERE in_stock;
+CREATE INDEX IF NOT EXISTS idx_product_cards_instock_category_price
+    ON t_p94134469_chandelier_sale_site.product_cards (category, price, id) WHERE in_stock;
+CREATE INDEX IF NOT EXISTS idx_product_cards_instock_rating
+    ON t_p94134469_chandelier_sale_site.product_cards (COALESCE(rating, 0), COALESCE(reviews, 0), id) WHERE in_stock;
+CREATE INDEX IF NOT EXISTS idx_product_cards_instock_category_rating
+    ON t_p94134469_chandelier_sale_site.product_cards (category, COALESCE(rating, 0), COALESCE(reviews, 0), id) WHERE in_stock;
+CREATE INDEX IF NOT EXISTS idx_product_cards_instock_newest
+    ON t_p94134469_chandelier_sale_site.product_cards (COALESCE(created_at, 'epoch'::timestamp), id) WHERE in_stock;
+CREATE INDEX IF NOT EXISTS idx_product_cards_instock_category_newest
+    ON t_p94134469_chandelier_sale_site.product_cards (category, COALESCE(created_at, 'epoch'::timestamp), id) WHERE in_stock;
+CREATE INDEX IF NOT EXISTS idx_product_cards_instock_popular
+    ON t_p94134469_chandelier_sale_site.product_cards (COALESCE(reviews, 0), COALESCE(rating, 0), id) WHERE in_stock;
+CREATE INDEX IF NOT EXISTS idx_product_cards_instock_category_popular
+    ON t_p94134469_chandelier_sale_site.product_cards (category, COALESCE(reviews, 0), COALESCE(rating, 0), id) WHERE in_stock;
+
+ANALYZE t_p94134469_chandelier_sale_site.product_cards;
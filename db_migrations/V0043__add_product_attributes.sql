@@ -0,0 +1,57 @@
+-- Характеристики товара в одной jsonb-колонке для фильтра ?attr[ключ]=значение1,значение2.
+-- Каждое значение хранится массивом: списки через запятую или точку с запятой (materials, interior, place)
+-- разбиваются на отдельные значения, например {"materials": ["Металл", "Стекло"], "ip_rating": ["IP20"]}.
+-- Любая комбинация фильтров — это проверки attributes @> ..., которые обслуживает один GIN-индекс.
+-- Набор ключей должен совпадать с ATTRIBUTE_KEYS в backend/products/query_builder.py
+ALTER TABLE t_p94134469_chandelier_sale_site.products
+ADD COLUMN IF NOT EXISTS attributes JSONB NOT NULL DEFAULT '{}'::jsonb;
+
+-- Колонку заполняет триггер, поэтому её видят все записи: импорт, админка, массовый PATCH
+CREATE OR REPLACE FUNCTION t_p94134469_chandelier_sale_site.build_product_attributes()
+RETURNS trigger AS $$
+BEGIN
+    NEW.attributes := COALESCE((
+        SELECT jsonb_object_agg(key, vals)
+        FROM (
+            SELECT a.key, jsonb_agg(DISTINCT v.value) AS vals
+            FROM (VALUES
+                ('materials', NEW.materials),
+                ('frame_material', NEW.frame_material),
+                ('shade_material', NEW.shade_material),
+                ('frame_color', NEW.frame_color),
+                ('shade_color', NEW.shade_color),
+                ('lamp_type', NEW.lamp_type),
+                ('socket_type', NEW.socket_type),
+                ('bulb_type', NEW.bulb_type),
+                ('shade_direction', NEW.shade_direction),
+                ('diffuser_type', NEW.diffuser_type),
+                ('diffuser_shape', NEW.diffuser_shape),
+                ('ip_rating', NEW.ip_rating),
+                ('interior', NEW.interior),
+                ('place', NEW.place),
+                ('mount_type', NEW.mount_type),
+                ('collection', NEW.collection),
+                ('brand_country', NEW.brand_country),
+                ('manufacturer_country', NEW.manufacturer_country)
+            ) AS a(key, value)
+            CROSS JOIN LATERAL regexp_split_to_table(btrim(a.value), '\s*[,;]\s*') AS v(value)
+            WHERE a.value IS NOT NULL AND v.value <> ''
+            GROUP BY a.key
+        ) t
+    ), '{}'::jsonb);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_products_attributes ON t_p94134469_chandelier_sale_site.products;
+CREATE TRIGGER trg_products_attributes
+BEFORE INSERT OR UPDATE OF materials, frame_material, shade_material, frame_color, shade_color, lamp_type, socket_type, bulb_type, shade_direction, diffuser_type, diffuser_shape, ip_rating, interior, place, mount_type, collection, brand_country, manufacturer_country
+ON t_p94134469_chandelier_sale_site.products
+FOR EACH ROW EXECUTE FUNCTION t_p94134469_chandelier_sale_site.build_product_attributes();
+
+-- Заполнение для текущего каталога: UPDATE OF materials запускает триггер для каждой строки
+UPDATE t_p94134469_chandelier_sale_site.products SET materials = materials;
+
+-- jsonb_path_ops: компактнее обычного GIN и достаточно для оператора @>
+CREATE INDEX IF NOT EXISTS idx_products_attributes
+ON t_p94134469_chandelier_sale_site.products USING GIN (attributes jsonb_path_ops);
@@ -0,0 +1,43 @@
+-- Фильтры диапазонов ?min_/max_ по размерам и мощности: height, diameter, length, width,
+-- lamp_count, lamp_power, total_power, lighting_area.
+-- По V0005 эти колонки уже INTEGER, поэтому тип меняется, только если на базе он оказался другим
+-- (например, текстовым после ручных правок): из значения остаются цифры, пустое становится NULL
+DO $$
+DECLARE
+    tbl TEXT;
+    col TEXT;
+BEGIN
+    FOREACH tbl IN ARRAY ARRAY['products', 'product_cards'] LOOP
+        FOREACH col IN ARRAY ARRAY['height', 'diameter', 'length', 'width', 'lamp_count', 'lamp_power', 'total_power', 'lighting_area'] LOOP
+            IF EXISTS (
+                SELECT 1 FROM information_schema.columns
+                WHERE table_schema = 't_p94134469_chandelier_sale_site' AND table_name = tbl AND column_name = col
+                  AND data_type NOT IN ('smallint', 'integer', 'bigint', 'numeric')
+            ) THEN
+                EXECUTE format(
+                    'ALTER TABLE t_p94134469_chandelier_sale_site.%I ALTER COLUMN %I TYPE INTEGER USING NULLIF(regexp_replace(%I::text, ''[^0-9]'', '''', ''g''), '''')::integer',
+                    tbl, col, col
+                );
+            END IF;
+        END LOOP;
+    END LOOP;
+END $$;
+
+-- Каталог с такими фильтрами читает узкую product_cards (см. V0042), индексы строятся на ней.
+-- Значения размеров не коррелируют с физическим порядком строк, поэтому BRIN здесь бесполезен — нужен btree
+CREATE INDEX IF NOT EXISTS idx_product_cards_instock_height
+    ON t_p94134469_chandelier_sale_site.product_cards (height) WHERE in_stock AND height IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_product_cards_instock_diameter
+    ON t_p94134469_chandelier_sale_site.product_cards (diameter) WHERE in_stock AND diameter IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_product_cards_instock_length
+    ON t_p94134469_chandelier_sale_site.product_cards (length) WHERE in_stock AND length IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_product_cards_instock_width
+    ON t_p94134469_chandelier_sale_site.product_cards (width) WHERE in_stock AND width IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_product_cards_instock_lamp_count
+    ON t_p94134469_chandelier_sale_site.product_cards (lamp_count) WHERE in_stock AND lamp_count IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_product_cards_instock_lamp_power
+    ON t_p94134469_chandelier_sale_site.product_cards (lamp_power) WHERE in_stock AND lamp_power IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_product_cards_instock_total_power
+    ON t_p94134469_chandelier_sale_site.product_cards (total_power) WHERE in_stock AND total_power IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_product_cards_instock_lighting_area
+    ON t_p94134469_chandelier_sale_site.product_cards (lighting_area) WHERE in_stock AND lighting_area IS NOT NULL;
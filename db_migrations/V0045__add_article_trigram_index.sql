@@ -0,0 +1,2 @@
+-- Поиск по умолчанию полнотекстовый, а ввод, похожий на артикул, ищется подстрокой и по артикулу тоже
+CREATE INDEX IF NOT EXISTS idx_products_article_trgm ON t_p94134469_chandelier_sale_site.products USING gin (article gin_trgm_ops);
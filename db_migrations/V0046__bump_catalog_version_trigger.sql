@@ -0,0 +1,49 @@
+-- Версия каталога 'products' увеличивается триггером на самой таблице, а не в обработчиках:
+-- товары меняют и функция products, и admin-products, import-products, update-images-from-file,
+-- delete-placeholder-products, seed-products. Иначе после их записи ETag и кэш ответов GET
+-- оставались бы прежними до следующей записи через функцию products.
+-- Операторы, которые не изменили ни одной строки, версию не трогают
+CREATE OR REPLACE FUNCTION t_p94134469_chandelier_sale_site.bump_products_catalog_version()
+RETURNS trigger AS $$
+DECLARE
+    changed BOOLEAN := TRUE;
+BEGIN
+    -- Таблицы переходов видны только в своих ветках, поэтому проверки разнесены
+    IF TG_OP = 'DELETE' THEN
+        changed := EXISTS (SELECT 1 FROM old_rows);
+    ELSIF TG_OP IN ('INSERT', 'UPDATE') THEN
+        changed := EXISTS (SELECT 1 FROM new_rows);
+    END IF;
+
+    IF changed THEN
+        UPDATE t_p94134469_chandelier_sale_site.catalog_versions
+        SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+        WHERE catalog = 'products';
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Таблицы переходов допускаются только у триггеров на одно событие, поэтому их три (плюс TRUNCATE)
+DROP TRIGGER IF EXISTS trg_products_catalog_version_insert ON t_p94134469_chandelier_sale_site.products;
+CREATE TRIGGER trg_products_catalog_version_insert
+AFTER INSERT ON t_p94134469_chandelier_sale_site.products
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION t_p94134469_chandelier_sale_site.bump_products_catalog_version();
+
+DROP TRIGGER IF EXISTS trg_products_catalog_version_update ON t_p94134469_chandelier_sale_site.products;
+CREATE TRIGGER trg_products_catalog_version_update
+AFTER UPDATE ON t_p94134469_chandelier_sale_site.products
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION t_p94134469_chandelier_sale_site.bump_products_catalog_version();
+
+DROP TRIGGER IF EXISTS trg_products_catalog_version_delete ON t_p94134469_chandelier_sale_site.products;
+CREATE TRIGGER trg_products_catalog_version_delete
+AFTER DELETE ON t_p94134469_chandelier_sale_site.products
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION t_p94134469_chandelier_sale_site.bump_products_catalog_version();
+
+DROP TRIGGER IF EXISTS trg_products_catalog_version_truncate ON t_p94134469_chandelier_sale_site.products;
+CREATE TRIGGER trg_products_catalog_version_truncate
+AFTER TRUNCATE ON t_p94134469_chandelier_sale_site.products
+FOR EACH STATEMENT EXECUTE FUNCTION t_p94134469_chandelier_sale_site.bump_products_catalog_version();
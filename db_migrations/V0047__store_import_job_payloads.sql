@@ -0,0 +1,15 @@
+-- Товары задания импорта хранятся в базе по кускам, поэтому продолжение импорта — это запрос только с jobId,
+-- а большой набор можно загрузить несколькими запросами (uploaded_rows — сколько строк уже получено).
+-- Кусок удаляется отсюда в той же транзакции, в которой он импортирован
+ALTER TABLE t_p94134469_chandelier_sale_site.import_jobs
+ADD COLUMN IF NOT EXISTS uploaded_rows INTEGER NOT NULL DEFAULT 0;
+
+-- Задания, созданные до этой миграции, получили весь набор товаров сразу
+UPDATE t_p94134469_chandelier_sale_site.import_jobs SET uploaded_rows = total_rows;
+
+CREATE TABLE IF NOT EXISTS t_p94134469_chandelier_sale_site.import_job_payloads (
+    job_id INTEGER NOT NULL REFERENCES t_p94134469_chandelier_sale_site.import_jobs(id),
+    chunk_no INTEGER NOT NULL,
+    products JSONB NOT NULL,
+    PRIMARY KEY (job_id, chunk_no)
+);
@@ -0,0 +1,74 @@
+-- Начало описания для карточек каталога: сетка показывает две строки описания,
+-- а полное description в узкую product_cards (V0042) не копируется.
+-- В products это вычисляемая колонка, поэтому она есть у любой записи, в том числе из других функций
+ALTER TABLE t_p94134469_chandelier_sale_site.products
+ADD COLUMN IF NOT EXISTS description_excerpt TEXT GENERATED ALWAYS AS (left(description, 200)) STORED;
+
+ALTER TABLE t_p94134469_chandelier_sale_site.product_cards
+ADD COLUMN IF NOT EXISTS description_excerpt TEXT;
+
+-- Синхронизация карточек теперь копирует и description_excerpt
+CREATE OR REPLACE FUNCTION t_p94134469_chandelier_sale_site.sync_product_cards()
+RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        DELETE FROM t_p94134469_chandelier_sale_site.product_cards c
+        USING old_rows r
+        WHERE c.id = r.id;
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP = 'UPDATE' THEN
+        -- Строки, у которых сменился id
+        DELETE FROM t_p94134469_chandelier_sale_site.product_cards c
+        USING old_rows r
+        WHERE c.id = r.id AND NOT EXISTS (SELECT 1 FROM new_rows n WHERE n.id = r.id);
+    END IF;
+
+    INSERT INTO t_p94134469_chandelier_sale_site.product_cards (id, name, price, brand, type, image_url, in_stock, rating, reviews, has_remote, is_dimmable, has_color_change, article, category, style, color, is_sale, is_new, pickup_available, created_at, brand_country, manufacturer_country, lamp_type, materials, lamp_count, lamp_power, total_power, lighting_area, height, diameter, length, width, description_excerpt)
+    SELECT n.id, n.name, n.price, n.brand, n.type, n.image_url, n.in_stock, n.rating, n.reviews, n.has_remote, n.is_dimmable, n.has_color_change, n.article, n.category, n.style, n.color, n.is_sale, n.is_new, n.pickup_available, n.created_at, n.brand_country, n.manufacturer_country, n.lamp_type, n.materials, n.lamp_count, n.lamp_power, n.total_power, n.lighting_area, n.height, n.diameter, n.length, n.width, n.description_excerpt
+    FROM new_rows n
+    ON CONFLICT (id) DO UPDATE SET
+        name = EXCLUDED.name,
+        price = EXCLUDED.price,
+        brand = EXCLUDED.brand,
+        type = EXCLUDED.type,
+        image_url = EXCLUDED.image_url,
+        in_stock = EXCLUDED.in_stock,
+        rating = EXCLUDED.rating,
+        reviews = EXCLUDED.reviews,
+        has_remote = EXCLUDED.has_remote,
+        is_dimmable = EXCLUDED.is_dimmable,
+        has_color_change = EXCLUDED.has_color_change,
+        article = EXCLUDED.article,
+        category = EXCLUDED.category,
+        style = EXCLUDED.style,
+        color = EXCLUDED.color,
+        is_sale = EXCLUDED.is_sale,
+        is_new = EXCLUDED.is_new,
+        pickup_available = EXCLUDED.pickup_available,
+        created_at = EXCLUDED.created_at,
+        brand_country = EXCLUDED.brand_country,
+        manufacturer_country = EXCLUDED.manufacturer_country,
+        lamp_type = EXCLUDED.lamp_type,
+        materials = EXCLUDED.materials,
+        lamp_count = EXCLUDED.lamp_count,
+        lamp_power = EXCLUDED.lamp_power,
+        total_power = EXCLUDED.total_power,
+        lighting_area = EXCLUDED.lighting_area,
+        height = EXCLUDED.height,
+        diameter = EXCLUDED.diameter,
+        length = EXCLUDED.length,
+        width = EXCLUDED.width,
+        description_excerpt = EXCLUDED.description_excerpt
+    WHERE (product_cards.name, product_cards.price, product_cards.brand, product_cards.type, product_cards.image_url, product_cards.in_stock, product_cards.rating, product_cards.reviews, product_cards.has_remote, product_cards.is_dimmable, product_cards.has_color_change, product_cards.article, product_cards.category, product_cards.style, product_cards.color, product_cards.is_sale, product_cards.is_new, product_cards.pickup_available, product_cards.created_at, product_cards.brand_country, product_cards.manufacturer_country, product_cards.lamp_type, product_cards.materials, product_cards.lamp_count, product_cards.lamp_power, product_cards.total_power, product_cards.lighting_area, product_cards.height, product_cards.diameter, product_cards.length, product_cards.width, product_cards.description_excerpt)
+        IS DISTINCT FROM (EXCLUDED.name, EXCLUDED.price, EXCLUDED.brand, EXCLUDED.type, EXCLUDED.image_url, EXCLUDED.in_stock, EXCLUDED.rating, EXCLUDED.reviews, EXCLUDED.has_remote, EXCLUDED.is_dimmable, EXCLUDED.has_color_change, EXCLUDED.article, EXCLUDED.category, EXCLUDED.style, EXCLUDED.color, EXCLUDED.is_sale, EXCLUDED.is_new, EXCLUDED.pickup_available, EXCLUDED.created_at, EXCLUDED.brand_country, EXCLUDED.manufacturer_country, EXCLUDED.lamp_type, EXCLUDED.materials, EXCLUDED.lamp_count, EXCLUDED.lamp_power, EXCLUDED.total_power, EXCLUDED.lighting_area, EXCLUDED.height, EXCLUDED.diameter, EXCLUDED.length, EXCLUDED.width, EXCLUDED.description_excerpt);
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+UPDATE t_p94134469_chandelier_sale_site.product_cards c
+SET description_excerpt = p.description_excerpt
+FROM t_p94134469_chandelier_sale_site.products p
+WHERE p.id = c.id AND c.description_excerpt IS DISTINCT FROM p.description_excerpt;
@@ -0,0 +1,34 @@
+-- Версия каталога 'products' теперь берётся из последовательности, а не из строки catalog_versions.
+-- UPDATE одной строки из триггера V0046 держал её блокировку до конца транзакции: все писатели
+-- выстраивались в очередь за ней (import-products держал её весь обход), а встречные обновления
+-- products и этой строки могли взаимно заблокироваться. nextval не блокирует и не откатывается.
+CREATE SEQUENCE IF NOT EXISTS t_p94134469_chandelier_sale_site.products_catalog_version_seq;
+
+-- Продолжаем с прежней версии, чтобы старые ETag у клиентов не совпали с новыми
+SELECT setval(
+    't_p94134469_chandelier_sale_site.products_catalog_version_seq',
+    COALESCE((SELECT version FROM t_p94134469_chandelier_sale_site.catalog_versions WHERE catalog = 'products'), 0) + 1
+);
+
+CREATE OR REPLACE FUNCTION t_p94134469_chandelier_sale_site.bump_products_catalog_version()
+RETURNS trigger AS $$
+BEGIN
+    PERFORM nextval('t_p94134469_chandelier_sale_site.products_catalog_version_seq');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- nextval виден сразу, ещё до фиксации записи. Если увеличить версию в конце оператора, читатель
+-- успеет закэшировать старые данные под новой версией, и ETag останется прежним до следующей записи.
+-- Поэтому INSERT/UPDATE/DELETE увеличивают версию отложенным триггером при фиксации транзакции
+DROP TRIGGER IF EXISTS trg_products_catalog_version_insert ON t_p94134469_chandelier_sale_site.products;
+DROP TRIGGER IF EXISTS trg_products_catalog_version_update ON t_p94134469_chandelier_sale_site.products;
+DROP TRIGGER IF EXISTS trg_products_catalog_version_delete ON t_p94134469_chandelier_sale_site.products;
+
+DROP TRIGGER IF EXISTS trg_products_catalog_version_commit ON t_p94134469_chandelier_sale_site.products;
+CREATE CONSTRAINT TRIGGER trg_products_catalog_version_commit
+AFTER INSERT OR UPDATE OR DELETE ON t_p94134469_chandelier_sale_site.products
+DEFERRABLE INITIALLY DEFERRED
+FOR EACH ROW EXECUTE FUNCTION t_p94134469_chandelier_sale_site.bump_products_catalog_version();
+
+-- Отложенных триггеров на TRUNCATE не бывает, он остаётся триггером на оператор из V0046
@@ -0,0 +1,16 @@
+-- Тип товара («Люстра», «Бра», «Торшер») входит в полнотекстовый поиск с весом B:
+-- без него поиск по умолчанию (fts) не находил товары по типу, а подстрочный поиск находил.
+-- Выражение генерируемой колонки менять нельзя, поэтому колонка и её индекс пересоздаются
+ALTER TABLE t_p94134469_chandelier_sale_site.products DROP COLUMN IF EXISTS search_vector;
+
+ALTER TABLE t_p94134469_chandelier_sale_site.products
+ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('russian', coalesce(name, '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce(article, '')), 'A') ||
+    setweight(to_tsvector('russian', coalesce(type, '')), 'B') ||
+    setweight(to_tsvector('russian', coalesce(brand, '')), 'B') ||
+    setweight(to_tsvector('russian', coalesce(collection, '')), 'B') ||
+    setweight(to_tsvector('russian', coalesce(description, '')), 'D')
+) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_products_search_vector ON t_p94134469_chandelier_sale_site.products USING gin (search_vector);
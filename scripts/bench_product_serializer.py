@@ -0,0 +1,101 @@
+"""
+Microbenchmark for products GET serialization.
+
+Compares the per-row dict(zip(...)) + .get() mapping the listing used to do
+with the precompiled positional mapper from backend/products/serializer.py,
+both with the standard json module and with orjson when it is installed.
+
+    python scripts/bench_product_serializer.py --rows 1000 --repeat 50
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend', 'products'))
+
+import serializer  # noqa: E402
+from serializer import PRODUCT_FIELDS, row_mapper  # noqa: E402
+
+
+def make_rows(count):
+    rows = []
+    for i in range(count):
+        row = []
+        for key, column, _ in PRODUCT_FIELDS:
+            if column == 'id':
+                row.append(i + 1)
+            elif column in ('price', 'rating'):
+                row.append(Decimal(random.randint(100, 100000)) / 100)
+            elif column in ('reviews', 'lamp_count', 'lamp_power', 'total_power', 'lighting_area',
+                            'height', 'diameter', 'length', 'width', 'depth', 'chain_length'):
+                row.append(random.randint(0, 500))
+            elif column.startswith(('has_', 'is_', 'in_')) or column == 'suspended_ceiling':
+                row.append(random.random() > 0.5)
+            elif column == 'images':
+                row.append(json.dumps([f'https://cdn.example/{i}/{n}.jpg' for n in range(3)]))
+            else:
+                row.append(f'{column} {i} Люстра')
+        rows.append(tuple(row))
+    return rows
+
+
+def legacy_serialize(rows, description):
+    '''The mapping as it was done before: a dict per row and a lookup per field'''
+    col_names = [desc[0] for desc in description]
+    products = []
+    for row in rows:
+        product_dict = dict(zip(col_names, row))
+        product = {}
+        for key, column, convert in PRODUCT_FIELDS:
+            value = product_dict.get(column)
+            product[key] = convert(value) if convert else value
+        products.append(product)
+    return json.dumps({'products': products}, default=float)
+
+
+def compiled_serialize(rows, description):
+    map_row = row_mapper(PRODUCT_FIELDS, description)
+    return serializer.dumps({'products': [map_row(row) for row in rows]})
+
+
+def measure(name, func, rows, description, repeat):
+    func(rows, description)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func(rows, description)
+    elapsed = time.perf_counter() - started
+    rate = len(rows) * repeat / elapsed
+    print(f'{name:<28} {rate:>12,.0f} rows/sec')
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    description = [(column,) for _, column, _ in PRODUCT_FIELDS]
+
+    before = measure('dict(zip) + json', legacy_serialize, rows, description, args.repeat)
+
+    orjson = serializer.orjson
+    serializer.orjson = None
+    after = measure('compiled mapper + json', compiled_serialize, rows, description, args.repeat)
+    serializer.orjson = orjson
+
+    if orjson is not None:
+        after = measure('compiled mapper + orjson', compiled_serialize, rows, description, args.repeat)
+    else:
+        print('orjson is not installed, skipping')
+
+    print(f'speedup: {after / before:.2f}x')
+
+
+if __name__ == '__main__':
+    main()
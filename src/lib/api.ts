@@ -133,14 +133,39 @@ export const api = {
     pickup_available?: string;
     styles?: string;
     colors?: string;
+    // Ranges in millimetres, watts and square metres
+    min_height?: number;
+    max_height?: number;
+    min_diameter?: number;
+    max_diameter?: number;
+    min_length?: number;
+    max_length?: number;
+    min_width?: number;
+    max_width?: number;
+    min_lamp_count?: number;
+    max_lamp_count?: number;
+    min_lamp_power?: number;
+    max_lamp_power?: number;
+    min_total_power?: number;
+    max_total_power?: number;
+    min_lighting_area?: number;
+    max_lighting_area?: number;
+    sort?: 'price_asc' | 'price_desc' | 'rating' | 'newest' | 'popular';
+    view?: 'card' | 'full';
+    // Spec filters sent as attr[key]=v1,v2, e.g. { ip_rating: ['IP44'], materials: ['Стекло'] }
+    attrs?: Record<string, string[]>;
     limit?: number;
     offset?: number;
   }): Promise<{ products: Product[]; total: number }> {
     const params = new URLSearchParams();
     if (filters) {
-      Object.entries(filters).forEach(([key, value]) => {
+      const { attrs, ...rest } = filters;
+      Object.entries(rest).forEach(([key, value]) => {
         if (value !== undefined) params.append(key, String(value));
       });
+      Object.entries(attrs || {}).forEach(([key, values]) => {
+        if (values.length > 0) params.append(`attr[${key}]`, values.join(','));
+      });
     }
     
     const url = `${API_URLS.products}${params.toString() ? '?' + params.toString() : ''}`;
@@ -168,6 +193,15 @@ export const api = {
     return data.products && data.products.length > 0 ? data.products[0] : null;
   },
 
+  async getProductsByIds(ids: number[], view: 'card' | 'full' = 'card'): Promise<Product[]> {
+    if (ids.length === 0) return [];
+    const params = new URLSearchParams({ ids: ids.join(','), view });
+    const response = await fetch(`${API_URLS.products}?${params.toString()}`);
+    if (!response.ok) throw new Error('Failed to fetch products');
+    const data = await response.json();
+    return data.products || [];
+  },
+
   async register(data: {
     email: string;
     password: string;
@@ -288,18 +322,34 @@ export const api = {
   },
 
   async bulkCreateProducts(products: Omit<Product, 'id'>[]): Promise<{ success: number; errors: number; details?: string[] }> {
-    const response = await fetch(API_URLS.products, {
-      method: 'POST',
-      headers: { 'Content-Type': 'application/json' },
-      body: JSON.stringify({ products }),
-    });
-    
-    if (!response.ok) {
-      const errorText = await response.text();
-      console.error('Bulk create error:', response.status, errorText);
-      throw new Error(`Failed to bulk create products: ${response.status}`);
+    // Products are uploaded in parts of two chunks each and stored against the job; the job's chunkSize
+    // comes back with every response. 202 means the job is not finished yet and is continued by jobId alone
+    const chunksPerPart = 2;
+    let chunkSize = 1000;
+    let jobId: number | undefined;
+    let offset = 0;
+    for (;;) {
+      const part = products.slice(offset, offset + chunkSize * chunksPerPart);
+      const body = jobId === undefined
+        ? { products: part, totalRows: products.length, chunkSize }
+        : part.length > 0 ? { jobId, products: part, offset } : { jobId };
+      const response = await fetch(API_URLS.products, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(body),
+      });
+
+      if (!response.ok) {
+        const errorText = await response.text();
+        console.error('Bulk create error:', response.status, errorText);
+        throw new Error(`Failed to bulk create products: ${response.status}`);
+      }
+      const result = await response.json();
+      if (response.status !== 202) return result;
+      jobId = result.jobId;
+      chunkSize = result.chunkSize;
+      offset = result.uploadedRows;
     }
-    return response.json();
   },
 
   async updateProduct(id: number, data: Partial<Omit<Product, 'id'>>): Promise<Product> {
@@ -313,6 +363,35 @@ export const api = {
     return response.json();
   },
 
+  async bulkPatchProducts(items: Array<{
+    id?: number;
+    article?: string;
+    price?: number;
+    inStock?: boolean;
+    isSale?: boolean;
+    isNew?: boolean;
+    pickupAvailable?: boolean;
+    hasRemote?: boolean;
+    isDimmable?: boolean;
+    hasColorChange?: boolean;
+  }>): Promise<{
+    updated: number;
+    unchanged: number;
+    notFound: number;
+    duplicate: number;
+    invalid: number;
+    results: Array<{ row: number; id?: number | null; article?: string | null; status: string; error?: string }>;
+  }> {
+    const response = await fetch(API_URLS.products, {
+      method: 'PATCH',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify(items),
+    });
+
+    if (!response.ok) throw new Error(`Failed to patch products: ${response.status}`);
+    return response.json();
+  },
+
   async deleteProduct(id: number): Promise<void> {
     const response = await fetch(`${API_URLS.products}?id=${id}`, {
       method: 'DELETE',
@@ -117,6 +117,7 @@ const Catalog = () => {
       const filters: any = {
         limit: itemsPerPage,
         offset: (currentPage - 1) * itemsPerPage,
+        view: 'card',
       };
 
       if (searchQuery) filters.search = searchQuery;